@@ -0,0 +1,245 @@
+import argparse
+import os
+import struct
+import sys
+import time
+
+from rules import RULESETS
+from sprites import SPRITE_SIZE
+
+# File layout: a 16-byte header, a JSON index, then raw pixel data.
+#   header: magic, version, index length
+#   index:  {"entries": [{name, scale, width, height, mode, offset, length, source}, ...]}
+# Offsets count from the end of the index. Entries are grouped by scale,
+# sprites before the background, so the sprites of one scale are one
+# contiguous read. Pixels are stored undecoded: loading them is a copy.
+MAGIC = b"RPSASSET"
+VERSION = 1
+HEADER = struct.Struct("<8sII")
+
+BUNDLE_FILE = "assets.rpsbundle"
+BACKGROUND_FILE = "background.jpg"
+BACKGROUND = "background"
+
+# The window's size at scale 1; a scale 2 window is twice as big
+WINDOW_SIZE = (800, 800)
+
+# 1 for ordinary screens, 2 for HiDPI
+SCALES = (1, 2)
+
+# Screens at or above this many dots per inch get the scale 2 assets
+HIDPI_DPI = 144
+
+# Built on request only: the window doesn't draw them, so they'd be dead weight
+UNUSED = {BACKGROUND}
+
+
+def sprite_names():
+    # Every choice of every rule set that has a sprite
+    names = []
+    for rules in RULESETS.values():
+        for name in rules.choices:
+            if name not in names and os.path.exists(f"{name}.png"):
+                names.append(name)
+    return names
+
+
+def pick_scale(root):
+    return 2 if root.winfo_fpixels('1i') >= HIDPI_DPI else 1
+
+
+def scaled(size, scale):
+    return (size[0] * scale, size[1] * scale)
+
+
+def prepare(name, scale):
+    # The decoded, resized image the window would otherwise make at runtime
+    from PIL import Image, ImageOps
+
+    if name == BACKGROUND:
+        with Image.open(BACKGROUND_FILE) as img:
+            source = (img.width, img.height, len(img.getbands()))
+            # Cropped to the window's shape rather than stretched
+            image = ImageOps.fit(img.convert("RGB"), scaled(WINDOW_SIZE, scale), Image.LANCZOS)
+    else:
+        with Image.open(f"{name}.png") as img:
+            source = (img.width, img.height, len(img.getbands()))
+            image = img.convert("RGBA").resize(scaled(SPRITE_SIZE, scale), Image.LANCZOS)
+    return image, source
+
+
+def build(path=BUNDLE_FILE, scales=SCALES, background=False):
+    # json is only needed when building or opening a bundle
+    import json
+
+    names = sprite_names()
+    if background and os.path.exists(BACKGROUND_FILE):
+        names.append(BACKGROUND)
+
+    entries = []
+    blobs = []
+    offset = 0
+    for scale in scales:
+        for name in names:
+            image, source = prepare(name, scale)
+            data = image.tobytes()
+            entries.append({
+                'name': name,
+                'scale': scale,
+                'width': image.width,
+                'height': image.height,
+                'mode': image.mode,
+                'offset': offset,
+                'length': len(data),
+                # Width, height and bands of the source image, for the budget report
+                'source': source
+            })
+            blobs.append(data)
+            offset += len(data)
+
+    index = json.dumps({'entries': entries}).encode()
+    # Written under another name first, so a running game never reads half a bundle
+    temp = path + ".tmp"
+    with open(temp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(index)))
+        f.write(index)
+        for data in blobs:
+            f.write(data)
+    os.replace(temp, path)
+    return entries
+
+
+def read_index(f, path):
+    import json
+
+    header = f.read(HEADER.size)
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path}: not an asset bundle (file too short)")
+    magic, version, index_length = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path}: not a version {VERSION} asset bundle")
+    return json.loads(f.read(index_length))['entries'], HEADER.size + index_length
+
+
+class AssetBundle:
+    # The pixels of the requested entries of one scale, read in one go
+    def __init__(self, path, names, scale=1):
+        self.path = path
+        self.scale = scale
+        with open(path, 'rb') as f:
+            index, data_start = read_index(f, path)
+            self.entries = {
+                entry['name']: entry for entry in index
+                if entry['scale'] == scale and entry['name'] in names
+            }
+            if not self.entries:
+                self.data = b""
+                return
+            start = min(entry['offset'] for entry in self.entries.values())
+            end = max(entry['offset'] + entry['length'] for entry in self.entries.values())
+            f.seek(data_start + start)
+            self.data = f.read(end - start)
+        self.start = start
+
+    def image(self, name, size=None):
+        # A PIL image over the bundle's bytes; None if the bundle doesn't have
+        # it at this size (an old bundle, or a name it was built without)
+        entry = self.entries.get(name)
+        if entry is None or (size is not None and (entry['width'], entry['height']) != tuple(size)):
+            return None
+
+        from PIL import Image
+
+        begin = entry['offset'] - self.start
+        return Image.frombuffer(
+            entry['mode'],
+            (entry['width'], entry['height']),
+            self.data[begin:begin + entry['length']],
+            'raw',
+            entry['mode'],
+            0,
+            1
+        )
+
+
+def budget(entries):
+    # Bytes per entry the window loads: in the bundle, held at runtime (the
+    # PIL image plus Tk's 4 bytes a pixel for the PhotoImage) and what
+    # decoding the source image would take
+    rows = []
+    for entry in entries:
+        if entry['name'] in UNUSED:
+            continue
+        width, height, bands = entry['source']
+        rows.append({
+            'name': entry['name'],
+            'scale': entry['scale'],
+            'size': f"{entry['width']}x{entry['height']}",
+            'bundle': entry['length'],
+            'runtime': entry['length'] + entry['width'] * entry['height'] * 4,
+            'source': width * height * bands
+        })
+    return rows
+
+
+def format_budget(entries):
+    lines = [f"{'asset':<12} {'scale':>5} {'size':>10} {'bundle':>10} {'in memory':>10} {'decoding source':>16}"]
+    totals = {}
+    for row in budget(entries):
+        lines.append(
+            f"{row['name']:<12} {row['scale']:>4}x {row['size']:>10} {row['bundle'] / 1024:>8.0f}KB "
+            f"{row['runtime'] / 1024:>8.0f}KB {row['source'] / 1024:>14.0f}KB"
+        )
+        total = totals.setdefault(row['scale'], {'bundle': 0, 'runtime': 0, 'source': 0})
+        for key in total:
+            total[key] += row[key]
+    for scale, total in totals.items():
+        lines.append(
+            f"{'total':<12} {scale:>4}x {'':>10} {total['bundle'] / 1024:>8.0f}KB "
+            f"{total['runtime'] / 1024:>8.0f}KB {total['source'] / 1024:>14.0f}KB"
+        )
+    unused = sorted({entry['name'] for entry in entries if entry['name'] in UNUSED})
+    if unused:
+        lines.append(f"Not counted, the window doesn't load them: {', '.join(unused)}")
+    return "\n".join(lines), totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-scale the sprites and background into one asset bundle")
+    parser.add_argument("--output", default=BUNDLE_FILE, help=f"bundle file (default: {BUNDLE_FILE})")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES), help="scales to build (default: 1 2)")
+    parser.add_argument(
+        "--background",
+        action="store_true",
+        help="also pack the background image (the window doesn't draw it; left out of the budget)"
+    )
+    parser.add_argument("--report", action="store_true", help="only print the memory budget of an existing bundle")
+    parser.add_argument(
+        "--budget",
+        type=float,
+        metavar="MB",
+        help="exit with status 1 if any scale needs more than MB megabytes in memory"
+    )
+    args = parser.parse_args()
+
+    if args.report:
+        with open(args.output, 'rb') as f:
+            entries = read_index(f, args.output)[0]
+    else:
+        start = time.perf_counter()
+        entries = build(args.output, args.scales, args.background)
+        elapsed = time.perf_counter() - start
+        print(f"Built {args.output} ({os.path.getsize(args.output) / 1024:,.0f} KB, "
+              f"{len(entries)} images) in {elapsed:.2f}s\n")
+
+    text, totals = format_budget(entries)
+    print(text)
+    if args.budget is not None:
+        over = [scale for scale, total in totals.items() if total['runtime'] > args.budget * 1024 * 1024]
+        if over:
+            print(f"\nOver the {args.budget} MB budget at scale {', '.join(map(str, over))}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import threading
+
+from startup_profile import StartupProfile
+
+MUSIC_FILE = "music.mp3"
+SOUND_FILES = {
+    'click': "click.mp3",
+    'win': "win.mp3",
+    'lose': "lose.mp3"
+}
+
+
+class AudioManager:
+    def __init__(self, enabled=True, profile=None):
+        self.enabled = enabled
+        self.profile = profile or StartupProfile()
+        self.mixer = None
+        self.sounds = {}
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.stopped = False
+        self.loader = None
+
+    def start(self):
+        # Mixer setup and MP3 decoding run in the background; until they
+        # finish, play() is simply silent
+        if not self.enabled:
+            self.ready.set()
+            return
+        # Started once, however many windows share the mixer
+        if self.loader is not None:
+            return
+
+        self.loader = threading.Thread(target=self.load, name="audio-loader", daemon=True)
+        self.loader.start()
+
+    def load(self):
+        try:
+            # Imported here so that --no-sound never loads pygame at all
+            with self.profile.phase("import pygame"):
+                import pygame
+        except ImportError:
+            print("pygame is not installed. Continuing without sound.")
+            self.ready.set()
+            return
+
+        try:
+            with self.profile.phase("mixer init"):
+                pygame.mixer.init()
+            with self.profile.phase("sound load"):
+                pygame.mixer.music.load(MUSIC_FILE)
+                sounds = {name: pygame.mixer.Sound(path) for name, path in SOUND_FILES.items()}
+        except (pygame.error, OSError):
+            print("Sound files not found. Continuing without sound.")
+            self.ready.set()
+            return
+
+        with self.lock:
+            if self.stopped:
+                # The game quit while we were still loading
+                pygame.mixer.quit()
+            else:
+                self.mixer = pygame.mixer
+                self.sounds = sounds
+                self.mixer.music.play(-1)
+        self.ready.set()
+
+    def play(self, name):
+        sound = self.sounds.get(name)
+        if sound is not None:
+            sound.play()
+
+    def stop(self):
+        with self.lock:
+            self.stopped = True
+            if self.mixer is not None:
+                self.mixer.music.stop()
+                self.mixer.quit()
+                self.mixer = None
+                self.sounds = {}
@@ -0,0 +1,158 @@
+import argparse
+import time
+
+import numpy as np
+
+from game_engine import CHOICES, GameEngine
+from rules import CLASSIC, RESULT_NAMES, RPSLS
+
+
+def encode(choices, rules=CLASSIC):
+    return np.fromiter((rules.index[c] for c in choices), dtype=np.int8)
+
+
+def resolve_batch(player, computer, rules=CLASSIC):
+    player = np.asarray(player, dtype=np.int8)
+    computer = np.asarray(computer, dtype=np.int8)
+    size = rules.size
+    # Differences are -(N-1)..N-1; shifting by N keeps the remainder in int8
+    # and all three steps run in place on one temporary
+    results = np.subtract(player, computer)
+    if rules.direction < 0:
+        np.negative(results, out=results)
+    results += size
+    np.remainder(results, size, out=results)
+    if size == 3:
+        # Result codes are DRAW=0, WIN=1, LOSE=2: for three choices the
+        # distance already is the result
+        return results
+    # Larger games map the cyclic distance onto a result code
+    return np.asarray(rules.distance_results, dtype=np.int8).take(results)
+
+
+def resolve_batch_lookup(player, computer, rules=CLASSIC):
+    # Straight index into the compiled N x N outcome matrix
+    table = np.asarray(rules.matrix, dtype=np.int8)
+    index = np.asarray(player, dtype=np.intp) * rules.size
+    index += np.asarray(computer, dtype=np.intp)
+    return table.take(index)
+
+
+def count_results(results):
+    results = np.asarray(results, dtype=np.int8)
+    # Three count_nonzero passes beat bincount on small-valued int8 data
+    return {name: int(np.count_nonzero(results == code)) for code, name in enumerate(RESULT_NAMES)}
+
+
+def resolve_counts(player, computer, rules=CLASSIC):
+    return count_results(resolve_batch(player, computer, rules))
+
+
+def simulate_counts(rounds, seed=None, chunk=10_000_000, rules=CLASSIC):
+    # Uniform random vs uniform random, resolved a chunk at a time
+    rng = np.random.default_rng(seed)
+    totals = dict.fromkeys(RESULT_NAMES, 0)
+
+    while rounds > 0:
+        n = min(chunk, rounds)
+        player = rng.integers(0, rules.size, size=n, dtype=np.int8)
+        computer = rng.integers(0, rules.size, size=n, dtype=np.int8)
+        for name, count in resolve_counts(player, computer, rules).items():
+            totals[name] += count
+        rounds -= n
+
+    return totals
+
+
+def reference_winner(rules, player, computer):
+    # Straight from the rule set's verbs ("rock crushes scissors"), which are
+    # written out by hand rather than derived from the cyclic order
+    if player == computer:
+        return "DRAW"
+    if (player, computer) in rules.verbs:
+        return "WIN"
+    if (computer, player) in rules.verbs:
+        return "LOSE"
+    raise ValueError(f"{rules.name} has no verb for {player} vs {computer}")
+
+
+def check_agreement(rules=CLASSIC):
+    # The engine and both resolvers read the compiled matrix, so they are
+    # checked against the hand-written verbs instead of each other
+    engine = GameEngine(rules=rules)
+    choices = rules.choices
+    player = np.repeat(np.arange(rules.size), rules.size)
+    computer = np.tile(np.arange(rules.size), rules.size)
+
+    expected = [reference_winner(rules, choices[p], choices[c]) for p, c in zip(player, computer)]
+    if [engine.determine_winner(choices[p], choices[c]) for p, c in zip(player, computer)] != expected:
+        raise AssertionError(f"determine_winner disagrees with the rules of {rules.name}")
+    for resolver in (resolve_batch, resolve_batch_lookup):
+        got = [RESULT_NAMES[r] for r in resolver(player, computer, rules)]
+        if got != expected:
+            raise AssertionError(f"{resolver.__name__} disagrees with the rules of {rules.name}")
+
+
+def benchmark(sizes, scalar_limit=1_000_000, seed=0):
+    # The rule sets with a verb for every pair
+    for rules in (CLASSIC, RPSLS):
+        check_agreement(rules)
+    engine = GameEngine()
+    rng = np.random.default_rng(seed)
+    rows = []
+
+    for size in sizes:
+        player = rng.integers(0, 3, size=size, dtype=np.int8)
+        computer = rng.integers(0, 3, size=size, dtype=np.int8)
+
+        start = time.perf_counter()
+        vector_counts = count_results(resolve_batch(player, computer))
+        vector_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        count_results(resolve_batch_lookup(player, computer))
+        lookup_time = time.perf_counter() - start
+
+        # The per-pair string path is far too slow for 10^8 rounds;
+        # time it on a prefix and scale up
+        scalar_size = min(size, scalar_limit)
+        player_names = [CHOICES[p] for p in player[:scalar_size]]
+        computer_names = [CHOICES[c] for c in computer[:scalar_size]]
+        determine_winner = engine.determine_winner
+
+        start = time.perf_counter()
+        scalar_results = [determine_winner(p, c) for p, c in zip(player_names, computer_names)]
+        scalar_time = (time.perf_counter() - start) * size / scalar_size
+
+        prefix_counts = count_results(resolve_batch(player[:scalar_size], computer[:scalar_size]))
+        if prefix_counts != {name: scalar_results.count(name) for name in RESULT_NAMES}:
+            raise AssertionError("batch counts disagree with determine_winner")
+
+        rows.append((size, scalar_time, vector_time, lookup_time, vector_counts))
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the vectorized round resolver")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10**6, 10**7, 10**8],
+        help="batch sizes to time"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'rounds':>12} {'determine_winner':>18} {'modular':>10} {'lookup':>10} {'speedup':>9}")
+    for size, scalar_time, vector_time, lookup_time, counts in benchmark(args.sizes, seed=args.seed):
+        print(
+            f"{size:>12,} {scalar_time:>17.3f}s {vector_time:>9.3f}s "
+            f"{lookup_time:>9.3f}s {scalar_time / vector_time:>8.0f}x"
+        )
+        print(f"{'':>12} {counts}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import timeit
+
+import asset_bundle
+from game_engine import GameEngine
+from high_scores import HighScoreStore
+from sprites import SpriteCache
+
+BASELINE_FILE = "benchmark_baseline.json"
+
+# A benchmark fails when it is this much slower than its baseline. What is
+# compared is its time relative to a calibration loop timed right before and
+# after it, which cancels out how busy the machine happens to be.
+TOLERANCE = 0.5
+
+# The median of this many timing runs is kept
+REPEAT = 15
+
+# Seconds per timing run, for the benchmark and for the calibration loop
+RUN_SECONDS = 0.05
+
+# Rounds played before timing the history and statistics benchmarks
+PLAYED_ROUNDS = 1000
+
+SCORE_ENTRY = {
+    'player': 'bench',
+    'player_score': 5,
+    'computer_score': 3,
+    'round': 2,
+    'streak': 4,
+    'timestamp': "2024-01-01 12:00:00"
+}
+
+
+class StubCanvas:
+    # Stands in for tk.Canvas when there is no display; update_choice_display
+    # only reads these attributes and calls itemconfig
+    def __init__(self):
+        self.image_item = 1
+        self.text_item = 2
+        self.choice = ""
+        self.items = {}
+
+    def itemconfig(self, item, **options):
+        self.items.setdefault(item, {}).update(options)
+
+
+class Headless:
+    # The window attributes update_choice_display reads
+    def __init__(self, sprites):
+        self.sprites = sprites
+
+
+class Context:
+    # Shared setup: a scratch directory for databases and, if there is a
+    # display (or Xvfb), one hidden Tk root
+    def __init__(self):
+        self.directory = tempfile.mkdtemp(prefix="rps-bench-")
+        self.stores = []
+        self.root = None
+        try:
+            import tkinter as tk
+            self.root = tk.Tk()
+            self.root.withdraw()
+        except Exception:
+            pass
+
+    @property
+    def tk_mode(self):
+        return "tk" if self.root is not None else "stub"
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+    def store(self, name="scores.db"):
+        store = HighScoreStore(self.path(name), None)
+        store.wait_loaded()
+        self.stores.append(store)
+        return store
+
+    def database_with_scores(self, count, name="loaded.db"):
+        store = HighScoreStore(self.path(name), None)
+        for _ in range(count):
+            store.add(SCORE_ENTRY)
+        store.close()
+        return self.path(name)
+
+    def close(self):
+        for store in self.stores:
+            store.close()
+        if self.root is not None:
+            self.root.destroy()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def calibrate():
+    # Plain bytecode and no allocations: slows down with the machine, never
+    # with the game's code
+    total = 0
+    for i in range(100):
+        total += i
+    return total
+
+
+def played_engine(rounds=PLAYED_ROUNDS):
+    engine = GameEngine()
+    for i in range(rounds):
+        engine.play(engine.choices[i % len(engine.choices)])
+    return engine
+
+
+# Each benchmark sets up its state and returns the call to time, or the
+# call and a setup run before every timing run
+def bench_determine_winner(context):
+    engine = GameEngine()
+    return lambda: engine.determine_winner("rock", "scissors")
+
+
+def bench_update_scores(context):
+    engine = GameEngine()
+    results = itertools.cycle(["WIN", "WIN", "LOSE", "DRAW"])
+    return lambda: engine.update_scores(next(results))
+
+
+def bench_update_history(context):
+    # Counters plus the bounded history ring buffer, already full
+    engine = played_engine()
+    return lambda: engine.update_history("rock", "paper", "LOSE")
+
+
+def bench_play(context):
+    # One whole round: computer choice, winner, scores and history
+    engine = GameEngine()
+    return lambda: engine.play("rock")
+
+
+def bench_statistics(context):
+    # Everything show_statistics computes before building its text
+    return played_engine().statistics
+
+
+def bench_save_high_score(context):
+    # The Tk-thread half of save_high_score: queue the entry, update the cached
+    # top list. The writer is stopped first, or it would be inserting every
+    # entry into SQLite while they are being timed.
+    store = context.store()
+    store.close()
+
+    def setup():
+        with store.lock:
+            store.pending.clear()
+    return lambda: store.add(SCORE_ENTRY), setup
+
+
+def bench_high_score_write(context):
+    # A save all the way to disk
+    store = context.store("write.db")
+
+    def run():
+        store.add(SCORE_ENTRY)
+        store.flush()
+    return run
+
+
+def bench_load_high_scores(context):
+    # Opening the database and reading the top list, as at startup
+    path = context.database_with_scores(500)
+
+    def run():
+        store = HighScoreStore(path, None)
+        store.wait_loaded()
+        store.close()
+    return run
+
+
+def bench_high_scores_top(context):
+    # What the high score dialog reads
+    store = context.store("top.db")
+    for _ in range(20):
+        store.add(SCORE_ENTRY)
+    return store.top
+
+
+def bench_load_sprites(context):
+    # Decoding and scaling the PNGs, as without an asset bundle
+    def run():
+        sprites = SpriteCache()
+        for name in sprites.names:
+            sprites.load_image(name)
+    return run
+
+
+def bench_load_sprite_bundle(context):
+    # The same sprites out of a pre-scaled bundle
+    path = context.path("assets.rpsbundle")
+    asset_bundle.build(path, background=False)
+
+    def run():
+        sprites = SpriteCache(bundle_path=path)
+        for name in sprites.names:
+            sprites.load_image(name)
+    return run
+
+
+def bench_update_choice_display(context):
+    from rockpaperscissor import ModernRPSGame
+
+    sprites = SpriteCache()
+    if context.root is None:
+        # No Tk means no PhotoImages; the decoded images stand in for them
+        for name in sprites.names:
+            sprites.photos[name] = sprites.load_image(name)
+        canvas = StubCanvas()
+    else:
+        sprites.preload()
+        import tkinter as tk
+        canvas = tk.Canvas(context.root, width=160, height=160)
+        canvas.image_item = canvas.create_image(80, 80, state='hidden')
+        canvas.text_item = canvas.create_text(80, 80, text="")
+        canvas.choice = ""
+
+    window = Headless(sprites)
+    # Alternating choices, so every call reconfigures the canvas
+    choices = itertools.cycle(sprites.names)
+    return lambda: ModernRPSGame.update_choice_display(window, canvas, next(choices), '#FFA500')
+
+
+BENCHMARKS = {
+    'determine_winner': bench_determine_winner,
+    'update_scores': bench_update_scores,
+    'update_history': bench_update_history,
+    'play': bench_play,
+    'statistics': bench_statistics,
+    'save_high_score': bench_save_high_score,
+    'high_score_write': bench_high_score_write,
+    'load_high_scores': bench_load_high_scores,
+    'high_scores_top': bench_high_scores_top,
+    'load_sprite_bundle': bench_load_sprite_bundle,
+    'load_sprites': bench_load_sprites,
+    'update_choice_display': bench_update_choice_display
+}
+
+# Timings of these depend on whether a real Tk was available
+TK_BENCHMARKS = {'update_choice_display'}
+
+# The PNG decoding the asset bundle replaces: shown for comparison, never a
+# regression (Pillow's decode times swing too much on a shared machine)
+REFERENCE_BENCHMARKS = {'load_sprites'}
+
+
+def calls_per_run(timer):
+    # autorange aims for 0.2s; run lengths are scaled down from that
+    number, seconds = timer.autorange()
+    return max(1, round(number * RUN_SECONDS / seconds))
+
+
+def measure(call, repeat=REPEAT, setup="pass"):
+    # Seconds per call and time relative to calibrate(), both the median of
+    # `repeat` runs. Every run sits between two calibration runs, so a busy
+    # spell slows both sides of the ratio.
+    calibration = timeit.Timer(calibrate)
+    calibration_number = calls_per_run(calibration)
+    timer = timeit.Timer(call, setup)
+    number = calls_per_run(timer)
+
+    seconds = []
+    relative = []
+    for _ in range(repeat):
+        before = calibration.timeit(calibration_number) / calibration_number
+        run = timer.timeit(number) / number
+        after = calibration.timeit(calibration_number) / calibration_number
+        seconds.append(run)
+        relative.append(run / ((before + after) / 2))
+    return statistics.median(seconds), statistics.median(relative)
+
+
+def run_benchmarks(names, repeat=REPEAT):
+    context = Context()
+    try:
+        results = {}
+        relative = {}
+        for name in names:
+            call = BENCHMARKS[name](context)
+            setup = "pass"
+            if isinstance(call, tuple):
+                call, setup = call
+            results[name], relative[name] = measure(call, repeat, setup)
+            print(f"  {name:<24} {results[name] * 1e6:>12.3f} us")
+        return results, relative, context.tk_mode
+    finally:
+        context.close()
+
+
+def machine():
+    return f"{platform.python_implementation()} {platform.python_version()} on {platform.machine()}"
+
+
+def load_baseline(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, results, relative, tk_mode):
+    with open(path, 'w') as f:
+        json.dump({'machine': machine(), 'tk': tk_mode, 'seconds': results, 'relative': relative}, f, indent=4)
+        f.write("\n")
+
+
+def compare(baseline, results, relative, tk_mode, tolerance=TOLERANCE):
+    # Returns the names of benchmarks whose time relative to the calibration
+    # loop grew by more than `tolerance`; the seconds are shown for reference
+    if baseline['machine'] != machine():
+        print(f"Note: the baseline was recorded with {baseline['machine']}, this is {machine()}")
+    if 'relative' not in baseline:
+        print("Note: the baseline has no calibrated timings; run with --save to record them")
+
+    print(f"\n{'benchmark':<24} {'baseline':>12} {'now':>12} {'change':>8}")
+    regressions = []
+    for name, seconds in results.items():
+        before = baseline['seconds'].get(name)
+        if before is None or name not in baseline.get('relative', {}):
+            print(f"{name:<24} {'-':>12} {seconds * 1e6:>10.3f}us {'new':>8}")
+            continue
+        if name in TK_BENCHMARKS and baseline['tk'] != tk_mode:
+            print(f"{name:<24} {'skipped: baseline used ' + baseline['tk'] + ' Tk':>34}")
+            continue
+
+        change = relative[name] / baseline['relative'][name] - 1
+        status = ""
+        if name in REFERENCE_BENCHMARKS:
+            status = "  (reference)"
+        elif change > tolerance:
+            status = "  SLOWER"
+            regressions.append(name)
+        print(f"{name:<24} {before * 1e6:>10.3f}us {seconds * 1e6:>10.3f}us {change * 100:>+7.1f}%{status}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the game's hot paths against a stored baseline")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help=f"baseline file (default: {BASELINE_FILE})")
+    parser.add_argument("--save", action="store_true", help="store these timings as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE, help="allowed slowdown, 0.3 = 30%%")
+    parser.add_argument("--repeat", type=int, default=REPEAT)
+    args = parser.parse_args()
+
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f"unknown benchmark {name!r}")
+    names = args.names or list(BENCHMARKS)
+    print(f"Running {len(names)} benchmarks ({machine()})")
+    results, relative, tk_mode = run_benchmarks(names, args.repeat)
+
+    if args.save:
+        save_baseline(args.baseline, results, relative, tk_mode)
+        print(f"\nBaseline written to {args.baseline}")
+        return
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f"\nNo baseline at {args.baseline}; run with --save to record one")
+        return
+
+    regressions = compare(baseline, results, relative, tk_mode, args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) more than {args.tolerance:.0%} slower: {', '.join(regressions)}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
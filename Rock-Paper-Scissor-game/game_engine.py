@@ -0,0 +1,207 @@
+import random
+import time
+from collections import Counter, deque
+
+from rules import CLASSIC
+
+# Game constants shared by the Tk window and headless simulations
+TARGET_SCORE = 5
+ROUND_TIMES = [60, 45, 30, 20, 10]
+RESULTS = ["WIN", "LOSE", "DRAW"]
+
+# Rounds kept in round_history; older ones only survive in the totals
+HISTORY_SIZE = 1000
+
+# The classic three-choice game; other variants come from rules.RULESETS
+CHOICES = CLASSIC.choices
+OUTCOMES = CLASSIC.outcomes
+
+
+class RoundRecord:
+    __slots__ = ('user_choice', 'computer_choice', 'result', 'timestamp')
+
+    def __init__(self, user_choice, computer_choice, result, timestamp):
+        self.user_choice = user_choice
+        self.computer_choice = computer_choice
+        self.result = result
+        self.timestamp = timestamp
+
+    def time_text(self):
+        # Formatted only when something is displayed
+        return time.strftime("%H:%M:%S", time.localtime(self.timestamp))
+
+
+class GameEngine:
+    def __init__(self, round_num=1, rng=None, history_size=HISTORY_SIZE, clock=time.monotonic, strategy=None,
+                 rules=CLASSIC, match_log=None, wallclock=time.time):
+        self.TARGET_SCORE = TARGET_SCORE
+        self.ROUND_TIMES = ROUND_TIMES
+        self.rules = rules
+        self.choices = rules.choices
+        self.outcomes = rules.outcomes
+        self.rng = rng if rng is not None else random.Random()
+        self.history_size = history_size
+        self.clock = clock
+        # Timestamps for the history; recorded sessions supply their own
+        self.wallclock = wallclock
+        # Computer opponent from strategies.py; None means uniform random
+        self.strategy = strategy
+        # Every round is also appended here (a match_log.MatchLog) when set
+        self.match_log = match_log
+
+        # Game state
+        self.round_num = round_num
+        self.user_score = 0
+        self.computer_score = 0
+        self.current_streak = 0
+        self.best_streak = 0
+        self.round_history = deque(maxlen=history_size)
+        self.reset_counters()
+        self.time_left = self.round_time()
+        self.deadline = None
+
+    def reset_counters(self):
+        # Running totals behind statistics(); updated once per round
+        self.total_rounds = 0
+        self.result_counts = dict.fromkeys(RESULTS, 0)
+        self.choice_counts = dict.fromkeys(self.choices, 0)
+        self.choice_wins = dict.fromkeys(self.choices, 0)
+
+    def round_time(self):
+        # Rounds past the last configured limit keep the shortest time
+        index = min(self.round_num, len(self.ROUND_TIMES)) - 1
+        return self.ROUND_TIMES[index]
+
+    def computer_choice(self):
+        if self.strategy is not None:
+            return self.strategy.choose()
+        return self.rng.choice(self.choices)
+
+    def determine_winner(self, player, computer):
+        return self.outcomes[(player, computer)]
+
+    def update_scores(self, result):
+        if result == "WIN":
+            self.user_score += 1
+            self.current_streak += 1
+            if self.current_streak > self.best_streak:
+                self.best_streak = self.current_streak
+        elif result == "LOSE":
+            self.computer_score += 1
+            self.current_streak = 0
+
+    def update_history(self, player_choice, computer_choice, result):
+        # Totals cover every round, the ring buffer only the latest ones
+        self.total_rounds += 1
+        self.result_counts[result] += 1
+        self.choice_counts[player_choice] += 1
+        if result == "WIN":
+            self.choice_wins[player_choice] += 1
+        if self.strategy is not None:
+            self.strategy.observe(player_choice, computer_choice)
+        if self.match_log is not None:
+            self.match_log.append(player_choice, computer_choice, result)
+
+        if not self.history_size:
+            return None
+
+        entry = RoundRecord(player_choice, computer_choice, result, self.wallclock())
+        self.round_history.append(entry)
+        return entry
+
+    def play(self, player_choice, computer_choice=None):
+        if computer_choice is None:
+            computer_choice = self.computer_choice()
+
+        result = self.outcomes[(player_choice, computer_choice)]
+        self.update_scores(result)
+        self.update_history(player_choice, computer_choice, result)
+        return computer_choice, result
+
+    def get_most_used_choice(self):
+        if not self.total_rounds:
+            return None
+        return max(self.choices, key=self.choice_counts.__getitem__)
+
+    def get_best_choice(self):
+        used = [choice for choice in self.choices if self.choice_counts[choice]]
+        if not used:
+            return None
+        return max(used, key=lambda choice: self.choice_wins[choice] / self.choice_counts[choice])
+
+    def statistics(self):
+        total = self.total_rounds
+        return {
+            'total_rounds': total,
+            'wins': self.result_counts['WIN'],
+            'losses': self.result_counts['LOSE'],
+            'draws': self.result_counts['DRAW'],
+            'win_rate': self.result_counts['WIN'] / total * 100 if total else 0.0,
+            'current_streak': self.current_streak,
+            'best_streak': self.best_streak,
+            'choice_counts': dict(self.choice_counts),
+            'choice_wins': dict(self.choice_wins),
+            'most_used_choice': self.get_most_used_choice(),
+            'best_choice': self.get_best_choice()
+        }
+
+    def is_round_over(self):
+        return self.user_score >= self.TARGET_SCORE or self.computer_score >= self.TARGET_SCORE
+
+    def round_winner(self):
+        return "User" if self.user_score > self.computer_score else "Computer"
+
+    def start_timer(self):
+        # The round ends at a fixed point on the monotonic clock, so late
+        # or skipped timer callbacks can't stretch it
+        self.deadline = self.clock() + self.time_left
+
+    def stop_timer(self):
+        if self.deadline is not None:
+            self.update_time()
+            self.deadline = None
+
+    def update_time(self):
+        # Returns True once the round clock has run out
+        if self.deadline is not None:
+            self.time_left = max(self.deadline - self.clock(), 0.0)
+        return self.time_left <= 0
+
+    def reset(self, reset_all=False):
+        if reset_all:
+            self.user_score = 0
+            self.computer_score = 0
+            self.current_streak = 0
+            self.best_streak = 0
+            self.round_history.clear()
+            self.reset_counters()
+
+        self.time_left = self.round_time()
+        self.deadline = None
+
+
+def simulate(rounds, seed=None, chunk=65536, rules=CLASSIC):
+    # Bulk runs: both sides pick uniformly, no history kept.
+    # Moves are drawn a chunk at a time so the loop stays in C.
+    rng = random.Random(seed)
+    resolve = rules.outcomes.__getitem__
+    totals = Counter({"WIN": 0, "LOSE": 0, "DRAW": 0})
+
+    while rounds > 0:
+        n = min(chunk, rounds)
+        players = rng.choices(rules.choices, k=n)
+        computers = rng.choices(rules.choices, k=n)
+        totals.update(map(resolve, zip(players, computers)))
+        rounds -= n
+
+    return dict(totals)
+
+
+def simulate_match(engine, player_moves):
+    # Plays moves until the round is decided or the moves run out
+    results = []
+    for move in player_moves:
+        results.append(engine.play(move)[1])
+        if engine.is_round_over():
+            break
+    return results
@@ -0,0 +1,252 @@
+import getpass
+import os
+import sqlite3
+import threading
+from contextlib import closing
+
+from startup_profile import StartupProfile
+
+HIGH_SCORES_DB = 'high_scores.db'
+HIGH_SCORES_FILE = 'high_scores.json'
+TOP_SCORES = 10
+DEFAULT_PLAYER = 'Player'
+
+COLUMNS = ('player', 'player_score', 'computer_score', 'round', 'streak', 'timestamp')
+
+# Every query orders by the same key, so each one has a matching index
+# and both inserts and top-N reads are B-tree operations
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scores (
+    id INTEGER PRIMARY KEY,
+    player TEXT NOT NULL,
+    player_score INTEGER NOT NULL,
+    computer_score INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    streak INTEGER NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_rank
+    ON scores (player_score DESC, computer_score, id);
+CREATE INDEX IF NOT EXISTS scores_player_rank
+    ON scores (player, player_score DESC, computer_score, id);
+CREATE INDEX IF NOT EXISTS scores_round_rank
+    ON scores (round, player_score DESC, computer_score, id);
+CREATE TABLE IF NOT EXISTS migrations (
+    source TEXT PRIMARY KEY
+);
+"""
+
+ORDER = "ORDER BY player_score DESC, computer_score, id"
+INSERT_SQL = f"INSERT INTO scores ({', '.join(COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def score_key(entry):
+    return (-entry['player_score'], entry['computer_score'])
+
+
+def default_player_name():
+    try:
+        return getpass.getuser()
+    except (OSError, KeyError, ImportError):
+        return DEFAULT_PLAYER
+
+
+def read_scores(path):
+    # json is only needed for the one-off import of the old file
+    import json
+
+    try:
+        with open(path, 'r') as f:
+            scores = json.load(f)
+    except FileNotFoundError:
+        return []
+    except (OSError, ValueError):
+        print("Could not read high scores. Starting with an empty list.")
+        return []
+
+    if not isinstance(scores, list):
+        print("High scores file has the wrong format. Starting with an empty list.")
+        return []
+    # Entries that don't look like saved scores are skipped, not imported
+    valid = [entry for entry in scores if valid_entry(entry)]
+    if len(valid) < len(scores):
+        print(f"Skipped {len(scores) - len(valid)} malformed high score entries.")
+    return valid
+
+
+def valid_entry(entry):
+    return (
+        isinstance(entry, dict)
+        and isinstance(entry.get('player', DEFAULT_PLAYER), str)
+        and all(isinstance(entry.get(key), int) for key in ('player_score', 'computer_score', 'round', 'streak'))
+        and isinstance(entry.get('timestamp'), str)
+    )
+
+
+def entry_row(entry):
+    return (
+        entry.get('player', DEFAULT_PLAYER),
+        entry['player_score'],
+        entry['computer_score'],
+        entry['round'],
+        entry['streak'],
+        entry['timestamp']
+    )
+
+
+def open_database(path):
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def migrate_json(conn, json_path):
+    # Imports the old top-10 list once; the JSON file itself is left alone
+    source = os.path.basename(json_path)
+    with conn:
+        # Claiming the source first takes the write lock, so when several
+        # stores open the same database at once only one of them imports
+        claimed = conn.execute("INSERT OR IGNORE INTO migrations (source) VALUES (?)", (source,))
+        if not claimed.rowcount:
+            return 0
+
+        scores = read_scores(json_path)
+        conn.executemany(INSERT_SQL, [entry_row(entry) for entry in scores])
+    return len(scores)
+
+
+def query_top(conn, n=TOP_SCORES, player=None, round_num=None):
+    where = []
+    params = []
+    if player is not None:
+        where.append("player = ?")
+        params.append(player)
+    if round_num is not None:
+        where.append("round = ?")
+        params.append(round_num)
+
+    sql = f"SELECT {', '.join(COLUMNS)} FROM scores"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" {ORDER} LIMIT ?"
+    params.append(n)
+
+    return [dict(zip(COLUMNS, row)) for row in conn.execute(sql, params)]
+
+
+class HighScoreStore:
+    def __init__(self, path=HIGH_SCORES_DB, legacy_path=HIGH_SCORES_FILE, limit=TOP_SCORES, profile=None):
+        self.path = path
+        self.legacy_path = legacy_path
+        self.limit = limit
+        self.profile = profile or StartupProfile()
+        self.scores = []
+        self.pending = []
+        self.writing = False
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.loaded = threading.Event()
+        self.available = True
+        self.closed = False
+
+        # One worker owns the database connection: it opens and migrates
+        # the store, then writes queued scores, all off the Tk thread
+        self.worker = threading.Thread(target=self.run, name="high-scores", daemon=True)
+        self.worker.start()
+
+    def run(self):
+        conn = None
+        try:
+            with self.profile.phase("high-score open"):
+                conn = open_database(self.path)
+            with self.profile.phase("high-score load"):
+                if self.legacy_path:
+                    migrate_json(conn, self.legacy_path)
+                self.load(conn)
+        except sqlite3.Error:
+            print("Could not open the high score database. Scores won't be saved.")
+            if conn is not None:
+                conn.close()
+            with self.lock:
+                self.available = False
+                self.pending = []
+                self.loaded.set()
+                self.changed.notify_all()
+            return
+
+        with closing(conn):
+            self.write_loop(conn)
+
+    def load(self, conn):
+        scores = query_top(conn, self.limit)
+        with self.lock:
+            # Scores added before the database was read are merged in
+            self.scores = sorted(scores + self.scores, key=score_key)[:self.limit]
+            self.loaded.set()
+
+    def wait_loaded(self, timeout=None):
+        return self.loaded.wait(timeout)
+
+    def top(self, n=None):
+        # The top list is cached in memory, so the high score dialog never waits on disk
+        with self.lock:
+            return list(self.scores[:n or self.limit])
+
+    def add(self, entry):
+        entry = dict(entry)
+        entry.setdefault('player', DEFAULT_PLAYER)
+        with self.lock:
+            if self.available:
+                self.pending.append(entry)
+            if len(self.scores) < self.limit or score_key(entry) < score_key(self.scores[-1]):
+                self.scores.append(entry)
+                self.scores.sort(key=score_key)
+                del self.scores[self.limit:]
+            self.changed.notify_all()
+
+    def write_loop(self, conn):
+        while True:
+            with self.lock:
+                while not self.closed and not self.pending:
+                    self.changed.wait()
+                if not self.pending:
+                    return
+
+                # Saves that arrive while a batch is being written go into the next one
+                batch = self.pending
+                self.pending = []
+                self.writing = True
+
+            try:
+                with conn:
+                    conn.executemany(
+                        INSERT_SQL,
+                        [entry_row(entry) for entry in batch]
+                    )
+            except sqlite3.Error:
+                print("Could not save high scores")
+
+            with self.lock:
+                self.writing = False
+                self.changed.notify_all()
+
+    def flush(self, timeout=None):
+        with self.lock:
+            return self.changed.wait_for(lambda: not self.pending and not self.writing, timeout)
+
+    def query(self, n=TOP_SCORES, player=None, round_num=None):
+        # Full leaderboard queries: per player, per round, or overall
+        self.wait_loaded()
+        self.flush()
+        if not self.available:
+            return self.top(n)
+        with closing(sqlite3.connect(self.path)) as conn:
+            return query_top(conn, n, player, round_num)
+
+    def close(self, timeout=5):
+        # Let the worker finish anything pending before the process exits
+        with self.lock:
+            self.closed = True
+            self.changed.notify_all()
+        self.worker.join(timeout)
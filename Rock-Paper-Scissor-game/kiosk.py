@@ -0,0 +1,205 @@
+import argparse
+import os
+import subprocess
+import sys
+import tkinter as tk
+
+from asset_bundle import BUNDLE_FILE, pick_scale
+from audio import AudioManager
+from high_scores import HighScoreStore
+from rockpaperscissor import ModernRPSGame, open_match_log
+from rules import RULESETS
+from session_record import new_seed
+from sprites import SpriteCache
+from strategies import STRATEGIES
+
+# Moves each session plays before memory is measured
+MEASURE_ROUNDS = 20
+
+# Seconds a measurement may take before the benchmark gives up on it
+MEASURE_TIMEOUT = 120
+
+
+class Kiosk:
+    # Several stations, each a ModernRPSGame in its own Toplevel, on one Tk
+    # interpreter. The mixer, decoded sprites, high-score store and match
+    # log are shared; scores, timers, input and history stay per station.
+    def __init__(self, stations=2, sound=True, strategy="random", rules="classic",
+                 match_log='matches.rpslog', assets=BUNDLE_FILE, seed=None, score_store=None):
+        self.strategy = strategy
+        self.rules_name = rules
+        self.seed = seed
+        self.root = tk.Tk()
+        self.root.withdraw()
+
+        self.audio = AudioManager(enabled=sound)
+        self.audio.start()
+        self.score_store = score_store or HighScoreStore()
+        # One log for every station; rounds from two logs on one file would mix
+        self.match_log = open_match_log(match_log, rules)
+        self.sprites = SpriteCache(RULESETS[rules].choices, bundle_path=assets, scale=pick_scale(self.root))
+
+        self.stations = []
+        self.opened = 0
+        for _ in range(stations):
+            self.add_station()
+
+    def add_station(self, headless=False):
+        # A headless station has no visible window but plays like any other
+        self.opened += 1
+        seed = self.seed + self.opened if self.seed is not None else new_seed()
+        game = ModernRPSGame(
+            score_store=self.score_store,
+            strategy=self.strategy,
+            rules=self.rules_name,
+            seed=seed,
+            kiosk=self
+        )
+        game.player_name = f"Station {self.opened}"
+        if headless:
+            game.root.withdraw()
+        self.stations.append(game)
+        return game
+
+    def leave(self, game):
+        # Called by a station's quit_game; the last one out closes the kiosk
+        self.stations.remove(game)
+        if not self.stations:
+            self.close()
+
+    def close(self):
+        self.audio.stop()
+        self.root.quit()
+        self.root.destroy()
+        self.score_store.close()
+        if self.match_log is not None:
+            self.match_log.close()
+
+
+def rss_bytes():
+    # Resident memory of this process, or None where it can't be read
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    # Peak rather than current; bytes on macOS, kilobytes elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def play_rounds(game, rounds=MEASURE_ROUNDS):
+    # The window's own display and score updates, but not play_round: its
+    # end-of-round check would open a message box nobody is there to answer.
+    # The timer is stopped for the same reason.
+    game.stop_timer()
+    choices = game.rules.choices
+    for i in range(rounds):
+        player_choice = choices[i % len(choices)]
+        computer_choice = game.engine.computer_choice()
+        game.update_choice_display(game.player_choice_display, player_choice, game.COLORS['player'])
+        game.update_choice_display(game.computer_choice_display, computer_choice, game.COLORS['computer'])
+        result = game.determine_winner(player_choice, computer_choice)
+        game.update_scores(result)
+        game.update_history(player_choice, computer_choice, result)
+    game.root.update()
+
+
+def measure(sessions, standalone=False):
+    # RSS of a process running `sessions` headless sessions, each having
+    # played a few rounds. Nothing is written: no sound, no match log and an
+    # in-memory score store.
+    store = HighScoreStore(':memory:', None)
+    if standalone:
+        # What every player costs when each runs rockpaperscissor.py
+        game = ModernRPSGame(score_store=store, sound=False, match_log=None)
+        game.root.withdraw()
+        play_rounds(game)
+    else:
+        kiosk = Kiosk(0, sound=False, match_log=None, score_store=store)
+        for _ in range(sessions):
+            play_rounds(kiosk.add_station(headless=True))
+    return rss_bytes()
+
+
+def measure_in_subprocess(sessions, standalone=False):
+    # A fresh interpreter per measurement, so earlier runs don't skew it
+    command = [sys.executable, __file__, "--measure", str(sessions)]
+    if standalone:
+        command.append("--standalone")
+    try:
+        result = subprocess.run(command, capture_output=True, text=True, timeout=MEASURE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        raise RuntimeError(f"no measurement after {MEASURE_TIMEOUT}s")
+    if result.returncode != 0 or not result.stdout.strip().isdigit():
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "no measurement")
+    return int(result.stdout.strip())
+
+
+def benchmark(counts):
+    try:
+        process = measure_in_subprocess(1, standalone=True)
+        kiosk = {n: measure_in_subprocess(n) for n in counts}
+    except RuntimeError as error:
+        # Usually no display; Xvfb will do
+        print(f"Could not measure: {error}")
+        return
+
+    mb = 1024 * 1024
+    print(f"One process per player: {process / mb:.1f} MB each")
+    print(f"\n{'sessions':>8} {'kiosk':>10} {'per session':>12} {'processes':>10}")
+    smallest = min(kiosk)
+    for n, rss in kiosk.items():
+        added = (rss - kiosk[smallest]) / (n - smallest) if n > smallest else None
+        per_session = f"{added / mb:>10.2f}MB" if added is not None else f"{'-':>12}"
+        print(f"{n:>8} {rss / mb:>8.1f}MB {per_session} {n * process / mb:>8.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Several Rock Paper Scissors stations in one process")
+    parser.add_argument("stations", type=int, nargs="?", default=2, help="number of game windows (default: 2)")
+    parser.add_argument("--no-sound", action="store_true", help="play without music or sound effects")
+    parser.add_argument("--ai", choices=list(STRATEGIES), default="random", help="how the computer picks its moves")
+    parser.add_argument("--rules", choices=list(RULESETS), default="classic", help="game variant of every station")
+    parser.add_argument("--match-log", default="matches.rpslog", metavar="PATH", help="shared binary round log")
+    parser.add_argument("--no-match-log", action="store_true", help="don't log rounds")
+    parser.add_argument("--seed", type=int, help="station N's computer uses seed + N (default: random)")
+    parser.add_argument(
+        "--benchmark",
+        type=int,
+        nargs="+",
+        metavar="N",
+        help="compare the memory of N headless sessions in one process with one process per player"
+    )
+    # Used by --benchmark to measure in a fresh process
+    parser.add_argument("--measure", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--standalone", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure is not None:
+        print(measure(args.measure, args.standalone))
+        return
+    if args.benchmark:
+        benchmark(sorted(set(args.benchmark)))
+        return
+    if args.stations < 1:
+        parser.error("a kiosk needs at least one station")
+
+    kiosk = Kiosk(
+        args.stations,
+        sound=not args.no_sound,
+        strategy=args.ai,
+        rules=args.rules,
+        match_log=None if args.no_match_log else args.match_log,
+        seed=args.seed
+    )
+    kiosk.root.mainloop()
+
+
+if __name__ == "__main__":
+    main()
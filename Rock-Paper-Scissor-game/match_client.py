@@ -0,0 +1,167 @@
+import argparse
+import asyncio
+import queue
+import random
+import socket
+import statistics
+import threading
+import time
+
+from match_protocol import DEFAULT_HOST, DEFAULT_PORT, decode, encode
+from rules import RULESETS
+
+
+def parse_address(text, default_port=DEFAULT_PORT):
+    # "host:port", "host" or ":port"
+    host, _, port = text.rpartition(":") if ":" in text else (text, "", "")
+    return host or DEFAULT_HOST, int(port) if port else default_port
+
+
+class MatchClient:
+    # Blocking socket with a reader thread, for the Tk window: the window
+    # polls messages from its own loop instead of running asyncio
+    def __init__(self, host, port, name, rules_name="classic"):
+        self.host = host
+        self.port = port
+        self.name = name
+        self.rules_name = rules_name
+        self.messages = queue.Queue()
+        self.lock = threading.Lock()
+        self.sock = None
+        self.reader = None
+
+    def connect(self, timeout=5):
+        self.sock = socket.create_connection((self.host, self.port), timeout)
+        self.sock.settimeout(None)
+        self.send({"type": "hello", "name": self.name, "rules": self.rules_name})
+        self.reader = threading.Thread(target=self.read_loop, name="match-client", daemon=True)
+        self.reader.start()
+
+    def read_loop(self):
+        try:
+            with self.sock.makefile("rb") as lines:
+                for line in lines:
+                    self.messages.put(decode(line))
+        except (OSError, ValueError):
+            pass
+        # None tells the window the connection is gone
+        self.messages.put(None)
+
+    def send(self, message):
+        try:
+            with self.lock:
+                self.sock.sendall(encode(message))
+        except OSError:
+            # The reader thread reports the lost connection
+            pass
+
+    def move(self, choice):
+        self.send({"type": "move", "choice": choice})
+
+    def ready(self):
+        self.send({"type": "ready"})
+
+    def poll(self):
+        # Every message that has arrived, without blocking
+        while True:
+            try:
+                yield self.messages.get_nowait()
+            except queue.Empty:
+                return
+
+    def close(self):
+        if self.sock is not None:
+            self.send({"type": "quit"})
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+
+
+async def bot(host, port, name, rules_name, rng, latencies):
+    # Load-test player: answers every prompt at once with a random move
+    choices = RULESETS[rules_name].choices
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode({"type": "hello", "name": name, "rules": rules_name}))
+    throws = 0
+    sent = None
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            message = decode(line)
+            kind = message["type"]
+            if kind == "result":
+                # Time from sending a move until the resolved throw comes back
+                latencies.append(time.perf_counter() - sent)
+                throws += 1
+            if kind == "start" or (kind == "result" and not message["round_over"]):
+                sent = time.perf_counter()
+                writer.write(encode({"type": "move", "choice": rng.choice(choices)}))
+            elif kind == "round_over":
+                if message["next_round"] is None:
+                    break
+                writer.write(encode({"type": "ready"}))
+            elif kind in ("opponent_left", "error"):
+                break
+    finally:
+        writer.close()
+    return throws
+
+
+async def load_test(matches, address=None, rules_name="classic", seed=0):
+    # Without an address the server runs in this process on a free port
+    server = None
+    if address is None:
+        from match_server import MatchServer
+
+        server = MatchServer(port=0)
+        await server.start()
+        address = (server.host, server.port)
+
+    rng = random.Random(seed)
+    latencies = []
+    start = time.perf_counter()
+    throws = await asyncio.gather(*(
+        bot(*address, f"bot-{i}", rules_name, random.Random(rng.random()), latencies)
+        for i in range(matches * 2)
+    ))
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        await server.close()
+
+    # Each throw is counted by both of its players
+    total = sum(throws) // 2
+    latencies.sort()
+    print(f"{matches:,} matches, {total:,} throws in {elapsed:.2f}s ({total / elapsed:,.0f} throws/s)")
+    if server is not None:
+        print(f"Matches running at once: {server.peak_matches:,}")
+    if latencies:
+        print(
+            f"Move latency: median {statistics.median(latencies) * 1000:.1f} ms, "
+            f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms, "
+            f"max {latencies[-1] * 1000:.1f} ms"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test for match_server.py")
+    parser.add_argument("--matches", type=int, default=2000, help="matches played at the same time")
+    parser.add_argument(
+        "--server",
+        metavar="HOST:PORT",
+        help="server to test (default: start one in this process)"
+    )
+    parser.add_argument("--rules", choices=list(RULESETS), default="classic")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    address = parse_address(args.server) if args.server else None
+    asyncio.run(load_test(args.matches, address, args.rules, args.seed))
+
+
+if __name__ == "__main__":
+    main()
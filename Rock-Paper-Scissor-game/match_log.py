@@ -0,0 +1,303 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+
+from game_engine import RoundRecord
+from rules import RESULT_NAMES, RULESETS
+
+# File layout: an 8-byte header, then fixed 8-byte records, appended forever.
+#   round:   time offset (ms since the session started), player, computer, result, ROUND
+#   session: wall-clock start (unix seconds), rules id, 0, 0, SESSION
+# Choices are indexes into the session's rule set, results are the rules.py codes.
+MAGIC = b"RPSLOG"
+VERSION = 1
+HEADER = struct.Struct("<6sBB")
+RECORD = struct.Struct("<IBBBB")
+ROUND, SESSION = 0, 1
+
+# Offsets are unsigned 32-bit milliseconds; a longer session starts a new one
+MAX_OFFSET = 2 ** 32 - 1
+
+# Rule sets are stored by position, so new ones must only be added at the end
+RULES_IDS = {name: i for i, name in enumerate(RULESETS)}
+RULES_NAMES = list(RULESETS)
+
+BUFFER_SIZE = 64 * 1024
+
+# Records read per step when streaming; bounds the reader's memory
+CHUNK_RECORDS = 1 << 20
+
+# Windows locks are mandatory, so the byte locked there is far past any
+# record rather than the header readers need
+LOCK_OFFSET = 2 ** 31 - 1
+
+
+def check_header(path):
+    # Returns the number of bytes holding whole records after the header
+    with open(path, 'rb') as f:
+        header = f.read(HEADER.size)
+        size = os.fstat(f.fileno()).st_size
+    if len(header) < HEADER.size:
+        raise ValueError(f"{path}: not a match log (file too short)")
+    magic, version, record_size = HEADER.unpack(header)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path}: not a version {VERSION} match log")
+    body = size - HEADER.size
+    return body - body % RECORD.size
+
+
+def lock(f, path):
+    # One writer per file: rounds from two logs would land under each other's
+    # session records. Released when the file is closed.
+    try:
+        if sys.platform == "win32":
+            import msvcrt
+            f.seek(LOCK_OFFSET)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        raise OSError(f"{path} is in use by another game") from None
+
+
+class MatchLog:
+    def __init__(self, path, rules_name='classic', clock=time.monotonic, buffer_size=BUFFER_SIZE):
+        self.path = path
+        self.clock = clock
+        self.rules_id = RULES_IDS[rules_name]
+        rules = RULESETS[rules_name]
+        # The three choice/result bytes of every possible round, packed once
+        self.round_bytes = {
+            (player, computer): bytes((rules.index[player], rules.index[computer], RESULT_NAMES.index(result), ROUND))
+            for (player, computer), result in rules.outcomes.items()
+        }
+
+        try:
+            # The header is written straight away, never from the buffer, so
+            # a second log opened on the same path sees it
+            with open(path, 'xb') as f:
+                f.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        except FileExistsError:
+            pass
+
+        self.file = open(path, 'ab', buffering=buffer_size)
+        try:
+            lock(self.file, path)
+            # A crash can leave half a record at the end; cut it off so new
+            # records stay aligned
+            length = HEADER.size + check_header(path)
+            if os.path.getsize(path) != length:
+                os.ftruncate(self.file.fileno(), length)
+        except (OSError, ValueError):
+            self.file.close()
+            raise
+        self.start_session()
+
+    def start_session(self):
+        self.started = self.clock()
+        self.file.write(RECORD.pack(int(time.time()), self.rules_id, 0, 0, SESSION))
+
+    def append(self, player_choice, computer_choice, result):
+        # result is implied by the two choices; it is stored for readers that
+        # don't want to resolve rounds themselves
+        offset = int((self.clock() - self.started) * 1000)
+        if offset > MAX_OFFSET:
+            self.start_session()
+            offset = 0
+        self.file.write(offset.to_bytes(4, 'little') + self.round_bytes[(player_choice, computer_choice)])
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def iter_blocks(path, chunk=CHUNK_RECORDS):
+    # Whole records, `chunk` at a time, copied out of a read-only mmap;
+    # only the pages being read are ever in memory
+    length = check_header(path)
+    if not length:
+        return
+    step = chunk * RECORD.size
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for start in range(HEADER.size, HEADER.size + length, step):
+            yield mapped[start:min(start + step, HEADER.size + length)]
+
+
+def iter_records(path, chunk=CHUNK_RECORDS):
+    # Raw (time, player, computer, result, kind) tuples
+    for block in iter_blocks(path, chunk):
+        yield from RECORD.iter_unpack(block)
+
+
+def replay(path):
+    # (rule set, RoundRecord) for every round, with wall-clock timestamps
+    rules = None
+    started = 0.0
+    for offset, player, computer, result, kind in iter_records(path):
+        if kind == SESSION:
+            rules = RULESETS[RULES_NAMES[player]]
+            started = offset
+            continue
+        yield rules, RoundRecord(
+            rules.choices[player],
+            rules.choices[computer],
+            RESULT_NAMES[result],
+            started + offset / 1000
+        )
+
+
+def empty_totals(rules_name):
+    return {
+        'sessions': 0,
+        'total_rounds': 0,
+        'results': dict.fromkeys(RESULT_NAMES, 0),
+        'choice_counts': dict.fromkeys(RULESETS[rules_name].choices, 0)
+    }
+
+
+def add_counts(totals, rules_name, results, choices):
+    # results / choices: sequences of counts indexed by code
+    choice_names = RULESETS[rules_name].choices
+    for code, count in enumerate(results):
+        totals['results'][RESULT_NAMES[code]] += int(count)
+        totals['total_rounds'] += int(count)
+    for code, count in enumerate(choices):
+        totals['choice_counts'][choice_names[code]] += int(count)
+
+
+def aggregate(path, chunk=CHUNK_RECORDS):
+    # Per rule set: sessions, rounds, result and player choice counts.
+    # Uses NumPy when it is installed and plain struct unpacking otherwise.
+    try:
+        import numpy as np
+    except ImportError:
+        np = None
+
+    totals = {}
+    rules_name = None
+    for block in iter_blocks(path, chunk):
+        if np is not None:
+            rules_name = aggregate_block_numpy(np, block, totals, rules_name)
+        else:
+            rules_name = aggregate_block(block, totals, rules_name)
+    return totals
+
+
+def aggregate_block(block, totals, rules_name):
+    # Without NumPy: strided slices pull one field out of every record, and
+    # bytes.count() does the counting in C
+    size = RECORD.size
+    kinds = block[7::size]
+    start = 0
+    while start < len(kinds):
+        marker = kinds.find(SESSION, start)
+        end = len(kinds) if marker < 0 else marker
+        if end > start and rules_name is not None:
+            stretch = block[start * size:end * size]
+            results, players = stretch[6::size], stretch[4::size]
+            add_counts(
+                totals[rules_name],
+                rules_name,
+                [results.count(code) for code in range(len(RESULT_NAMES))],
+                [players.count(code) for code in range(len(RULESETS[rules_name].choices))]
+            )
+        if marker < 0:
+            break
+        rules_name = RULES_NAMES[block[marker * size + 4]]
+        totals.setdefault(rules_name, empty_totals(rules_name))['sessions'] += 1
+        start = marker + 1
+    return rules_name
+
+
+def aggregate_block_numpy(np, block, totals, rules_name):
+    records = np.frombuffer(block, dtype=np.dtype([
+        ('offset', '<u4'), ('player', 'u1'), ('computer', 'u1'), ('result', 'u1'), ('kind', 'u1')
+    ]))
+    # Split the block at session records; each stretch has one rule set
+    sessions = np.flatnonzero(records['kind'] == SESSION)
+    bounds = [0, *sessions.tolist(), len(records)]
+    for i in range(len(bounds) - 1):
+        start, end = bounds[i], bounds[i + 1]
+        if i > 0:
+            rules_name = RULES_NAMES[records['player'][start]]
+            totals.setdefault(rules_name, empty_totals(rules_name))['sessions'] += 1
+            start += 1
+        if start == end or rules_name is None:
+            continue
+        stretch = records[start:end]
+        add_counts(
+            totals[rules_name],
+            rules_name,
+            np.bincount(stretch['result'], minlength=len(RESULT_NAMES)),
+            np.bincount(stretch['player'], minlength=len(RULESETS[rules_name].choices))
+        )
+    return rules_name
+
+
+def generate(path, rounds, rules_name='classic', seed=0, chunk=65536):
+    # Synthetic log for benchmarks: uniform moves, one round per millisecond
+    rules = RULESETS[rules_name]
+    outcomes = rules.outcomes
+    rng = random.Random(seed)
+    clock_now = [0.0]
+    log = MatchLog(path, rules_name, clock=lambda: clock_now[0])
+    append = log.append
+    while rounds > 0:
+        n = min(chunk, rounds)
+        for player, computer in zip(rng.choices(rules.choices, k=n), rng.choices(rules.choices, k=n)):
+            clock_now[0] += 0.001
+            append(player, computer, outcomes[(player, computer)])
+        rounds -= n
+    log.close()
+
+
+def format_totals(totals):
+    lines = []
+    for rules_name, counts in totals.items():
+        rounds = counts['total_rounds']
+        lines.append(f"{RULESETS[rules_name].name}: {counts['sessions']:,} sessions, {rounds:,} rounds")
+        for name, count in counts['results'].items():
+            lines.append(f"  {name:<10} {count:>14,} {count / max(rounds, 1) * 100:>6.1f}%")
+        for choice, count in counts['choice_counts'].items():
+            lines.append(f"  {choice:<10} {count:>14,} {count / max(rounds, 1) * 100:>6.1f}%")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize or replay a binary match log")
+    parser.add_argument("path", help="log file, e.g. matches.rpslog")
+    parser.add_argument("--replay", type=int, metavar="N", help="print the first N rounds instead of a summary")
+    parser.add_argument("--generate", type=int, metavar="ROUNDS", help="first append ROUNDS random rounds")
+    parser.add_argument("--rules", choices=list(RULESETS), default="classic", help="rule set for --generate")
+    args = parser.parse_args()
+
+    if args.generate:
+        start = time.perf_counter()
+        generate(args.path, args.generate, args.rules)
+        elapsed = time.perf_counter() - start
+        print(f"Wrote {args.generate:,} rounds in {elapsed:.2f}s ({args.generate / elapsed:,.0f} rounds/s)")
+
+    if args.replay is not None:
+        for count, (rules, record) in enumerate(replay(args.path)):
+            if count >= args.replay:
+                break
+            print(f"[{record.time_text()}] You: {record.user_choice} vs Computer: {record.computer_choice} - {record.result}")
+        return
+
+    start = time.perf_counter()
+    totals = aggregate(args.path)
+    elapsed = time.perf_counter() - start
+    print(format_totals(totals))
+    rounds = sum(counts['total_rounds'] for counts in totals.values())
+    print(f"\nRead {rounds:,} rounds ({os.path.getsize(args.path):,} bytes) in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
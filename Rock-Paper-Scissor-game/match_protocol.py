@@ -0,0 +1,18 @@
+import json
+
+# Shared by match_server.py and match_client.py; kept free of asyncio so the
+# window's client doesn't load it
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5050
+
+
+# Wire format: one JSON object per line, each with a "type"
+def encode(message):
+    return (json.dumps(message, separators=(",", ":")) + "\n").encode()
+
+
+def decode(line):
+    message = json.loads(line)
+    if not isinstance(message, dict) or not isinstance(message.get("type"), str):
+        raise ValueError("every message must be a JSON object with a 'type'")
+    return message
@@ -0,0 +1,276 @@
+import argparse
+import asyncio
+
+from game_engine import GameEngine
+from match_protocol import DEFAULT_HOST, DEFAULT_PORT, decode, encode
+from rules import RULESETS
+
+# Seconds both players get to confirm the next round before the match is dropped
+READY_TIMEOUT = 60
+
+NAME_LENGTH = 32
+
+# Results are worked out for the first player; the second sees them mirrored
+MIRRORED = {"WIN": "LOSE", "LOSE": "WIN", "DRAW": "DRAW"}
+
+
+class Player:
+    def __init__(self, name, rules_name, writer):
+        self.name = name
+        self.rules_name = rules_name
+        self.writer = writer
+        self.connected = True
+        # Set while the player is in a match
+        self.match = None
+        self.seat = None
+
+    def send(self, message):
+        # Messages are a few dozen bytes, one per move; the transport buffers
+        # them rather than every match waiting on drain()
+        if self.connected:
+            self.writer.write(encode(message))
+
+
+class Match:
+    def __init__(self, player_a, player_b, rules, clock):
+        self.players = (player_a, player_b)
+        self.rules = rules
+        # One engine per match, scored from the first player's side
+        self.engine = GameEngine(history_size=0, clock=clock, rules=rules)
+        # (seat, message) from both connections; message None means disconnected
+        self.inbox = asyncio.Queue()
+        self.alarm = None
+        self.alarm_handle = None
+        for seat, player in enumerate(self.players):
+            player.match = self
+            player.seat = seat
+
+    def send_each(self, message, first, second):
+        # Shared fields plus the ones seen from each player's side
+        for player, fields in zip(self.players, (first, second)):
+            player.send({**message, **fields})
+
+    def set_deadline(self, deadline):
+        # A loop timer drops a marker into the inbox at the deadline, which is
+        # much cheaper than wrapping every inbox.get() in wait_for()
+        if self.alarm_handle is not None:
+            self.alarm_handle.cancel()
+        self.alarm = object()
+        self.alarm_handle = asyncio.get_running_loop().call_at(deadline, self.inbox.put_nowait, (None, self.alarm))
+
+    async def next_message(self):
+        while True:
+            seat, message = await self.inbox.get()
+            if seat is not None:
+                return seat, message
+            # Markers from an earlier deadline are stale
+            if message is self.alarm:
+                raise asyncio.TimeoutError
+
+    async def run(self):
+        try:
+            rounds = len(self.engine.ROUND_TIMES)
+            for round_num in range(1, rounds + 1):
+                if round_num > 1 and not await self.wait_ready():
+                    return
+                if not await self.play_round(round_num, round_num == rounds):
+                    return
+        finally:
+            if self.alarm_handle is not None:
+                self.alarm_handle.cancel()
+            for player in self.players:
+                player.match = None
+                player.connected = False
+                player.writer.close()
+
+    async def play_round(self, round_num, last):
+        # Returns True when the match goes on to another round
+        engine = self.engine
+        a, b = self.players
+        engine.round_num = round_num
+        engine.reset(True)
+        # The deadline is the server's; clients only display it
+        engine.start_timer()
+        self.set_deadline(engine.deadline)
+        self.send_each(
+            {"type": "start", "round": round_num, "time_left": engine.time_left, "target": engine.TARGET_SCORE},
+            {"opponent": b.name},
+            {"opponent": a.name}
+        )
+
+        moves = [None, None]
+        while True:
+            try:
+                seat, message = await self.next_message()
+            except asyncio.TimeoutError:
+                engine.stop_timer()
+                self.finish_round("time_up", None)
+                return False
+            if message is None or message["type"] == "quit":
+                self.abandon(seat)
+                return False
+            # A second move before the throw is resolved is ignored
+            if message["type"] != "move" or moves[seat] is not None:
+                continue
+            choice = message.get("choice")
+            if not isinstance(choice, str) or choice not in self.rules.index:
+                self.players[seat].send({"type": "error", "message": f"{choice!r} is not a move in {self.rules.name}"})
+                continue
+
+            moves[seat] = choice
+            if None in moves:
+                continue
+
+            result = engine.play(moves[0], moves[1])[1]
+            engine.update_time()
+            round_over = engine.is_round_over()
+            self.send_each(
+                {"type": "result", "time_left": engine.time_left, "round_over": round_over},
+                {"you": moves[0], "opponent": moves[1], "result": result,
+                 "score": [engine.user_score, engine.computer_score]},
+                {"you": moves[1], "opponent": moves[0], "result": MIRRORED[result],
+                 "score": [engine.computer_score, engine.user_score]}
+            )
+            moves = [None, None]
+
+            if round_over:
+                engine.stop_timer()
+                self.finish_round("score_reached", None if last else round_num + 1)
+                return not last
+
+    def finish_round(self, reason, next_round):
+        engine = self.engine
+        if engine.user_score > engine.computer_score:
+            result = "WIN"
+        elif engine.computer_score > engine.user_score:
+            result = "LOSE"
+        else:
+            result = "DRAW"
+        self.send_each(
+            {"type": "round_over", "reason": reason, "round": engine.round_num, "next_round": next_round},
+            {"result": result, "score": [engine.user_score, engine.computer_score]},
+            {"result": MIRRORED[result], "score": [engine.computer_score, engine.user_score]}
+        )
+
+    async def wait_ready(self):
+        # Both players confirm before the next round's clock starts
+        self.set_deadline(self.engine.clock() + READY_TIMEOUT)
+        ready = [False, False]
+        while not all(ready):
+            try:
+                seat, message = await self.next_message()
+            except asyncio.TimeoutError:
+                for seat, player in enumerate(self.players):
+                    if not ready[seat]:
+                        self.abandon(seat)
+                        return False
+            if message is None or message["type"] == "quit":
+                self.abandon(seat)
+                return False
+            if message["type"] == "ready":
+                ready[seat] = True
+        return True
+
+    def abandon(self, seat):
+        self.players[1 - seat].send({"type": "opponent_left"})
+
+
+class MatchServer:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        self.host = host
+        self.port = port
+        self.server = None
+        # rules name -> the player waiting for an opponent
+        self.lobby = {}
+        self.matches = set()
+        self.matches_started = 0
+        self.peak_matches = 0
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_client, self.host, self.port, backlog=4096)
+        # Port 0 picks a free port; report the real one
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        for task in list(self.matches):
+            task.cancel()
+
+    async def handle_client(self, reader, writer):
+        player = None
+        try:
+            hello = decode(await reader.readline())
+            rules_name = hello.get("rules", "classic")
+            name = hello.get("name") or "Player"
+            if hello["type"] != "hello" or not isinstance(rules_name, str) or rules_name not in RULESETS:
+                raise ValueError(f"expected hello with rules from {', '.join(RULESETS)}")
+            if not isinstance(name, str):
+                raise ValueError("the name must be a string")
+
+            name = name[:NAME_LENGTH]
+            player = Player(name, rules_name, writer)
+            self.join_lobby(player)
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                message = decode(line)
+                # Anything sent while still in the lobby is dropped
+                if player.match is not None:
+                    player.match.inbox.put_nowait((player.seat, message))
+        except ValueError as error:
+            # Bad JSON, a line over the stream limit or a bad hello
+            writer.write(encode({"type": "error", "message": str(error)}))
+        except ConnectionError:
+            pass
+        finally:
+            if player is not None:
+                player.connected = False
+                if self.lobby.get(player.rules_name) is player:
+                    del self.lobby[player.rules_name]
+                if player.match is not None:
+                    player.match.inbox.put_nowait((player.seat, None))
+            writer.close()
+
+    def join_lobby(self, player):
+        # First come, first paired, per game variant
+        waiting = self.lobby.pop(player.rules_name, None)
+        if waiting is None:
+            self.lobby[player.rules_name] = player
+            player.send({"type": "waiting", "rules": player.rules_name})
+            return
+
+        match = Match(waiting, player, RULESETS[player.rules_name], asyncio.get_running_loop().time)
+        task = asyncio.create_task(match.run())
+        self.matches.add(task)
+        task.add_done_callback(self.matches.discard)
+        self.matches_started += 1
+        self.peak_matches = max(self.peak_matches, len(self.matches))
+
+
+async def serve(host, port):
+    server = MatchServer(host, port)
+    await server.start()
+    print(f"Match server listening on {server.host}:{server.port}")
+    try:
+        await server.server.serve_forever()
+    finally:
+        print(f"{server.matches_started} matches played, at most {server.peak_matches} at once")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rock Paper Scissors match server")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import bisect
+import time
+
+# Histogram bucket upper bounds in seconds, from 10us to 1s
+BUCKETS = (
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0
+)
+
+METRIC_NAME = "rps_phase_seconds"
+
+
+class LatencyHistogram:
+    def __init__(self, bounds=BUCKETS):
+        self.bounds = bounds
+        # One count per bucket, plus one for everything above the last bound
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds):
+        self.counts[bisect.bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th sample; the largest
+        # sample if it lies past the last bucket
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def as_dict(self):
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'max': self.max,
+            'p50': self.quantile(0.5),
+            'p99': self.quantile(0.99),
+            'buckets': dict(zip([*map(str, self.bounds), "+Inf"], self.counts))
+        }
+
+
+class PhaseTimer:
+    __slots__ = ('histogram', 'start')
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.histogram.record(time.perf_counter() - self.start)
+
+
+class NullPhase:
+    # Returned by a disabled Metrics: entering and leaving it does nothing
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *exc):
+        pass
+
+
+NULL_PHASE = NullPhase()
+
+
+class Metrics:
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.histograms = {}
+
+    def histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = LatencyHistogram()
+        return histogram
+
+    def phase(self, name):
+        # `with metrics.phase("winner"):` times the block when enabled
+        if not self.enabled:
+            return NULL_PHASE
+        return PhaseTimer(self.histogram(name))
+
+    def record(self, name, seconds):
+        if self.enabled:
+            self.histogram(name).record(seconds)
+
+    def summary_lines(self):
+        lines = [f"{'phase':<20} {'n':>6} {'p50':>9} {'p99':>9} {'max':>9}"]
+        for name, histogram in self.histograms.items():
+            lines.append(
+                f"{name:<20} {histogram.count:>6} {histogram.quantile(0.5) * 1000:>7.2f}ms "
+                f"{histogram.quantile(0.99) * 1000:>7.2f}ms {histogram.max * 1000:>7.2f}ms"
+            )
+        return lines
+
+    def to_json(self):
+        import json
+
+        return json.dumps({name: h.as_dict() for name, h in self.histograms.items()}, indent=4)
+
+    def to_prometheus(self):
+        # Text exposition format, one labelled histogram per phase
+        lines = [
+            f"# HELP {METRIC_NAME} Time spent in each phase of a round",
+            f"# TYPE {METRIC_NAME} histogram"
+        ]
+        for name, histogram in self.histograms.items():
+            cumulative = 0
+            for bound, count in zip([*map(str, histogram.bounds), "+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f'{METRIC_NAME}_bucket{{phase="{name}",le="{bound}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_sum{{phase="{name}"}} {histogram.total}')
+            lines.append(f'{METRIC_NAME}_count{{phase="{name}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path, format="json"):
+        text = self.to_prometheus() if format == "prometheus" else self.to_json()
+        try:
+            with open(path, 'w') as f:
+                f.write(text)
+        except OSError:
+            print(f"Could not write metrics to {path}")
@@ -1,19 +1,103 @@
+import time
+
+# Reference point for the startup benchmark and profile
+STARTED = time.perf_counter()
+
+# pygame, Pillow and json are imported by the modules below on first use,
+# not here, so none of them delay the first frame
+import argparse
+import random
 import tkinter as tk
 from tkinter import messagebox, ttk
-from PIL import Image, ImageTk
-import pygame
-import random
-import json
 from datetime import datetime
+from asset_bundle import BUNDLE_FILE, WINDOW_SIZE, pick_scale
+from audio import AudioManager
+from game_engine import GameEngine
+from high_scores import HighScoreStore, default_player_name
+from match_log import MatchLog
+from metrics import Metrics
+from session_record import SessionRecorder, SessionReplayer, load_session, new_seed
+from sprites import SpriteCache
+from startup_profile import StartupProfile
+from rules import RULESETS
+from strategies import STRATEGIES, make_strategy
+
+IMPORTED = time.perf_counter()
+
+
+def _engine_attr(name):
+    # Game state lives on the engine; the window just reads and writes through
+    return property(
+        lambda self: getattr(self.engine, name),
+        lambda self, value: setattr(self.engine, name, value)
+    )
+
+
+# Lines kept in the on-screen history panel
+HISTORY_LINES = 50
+
+# Timer display resolution in seconds
+TIMER_STEP = 0.1
+
+# Choice buttons wrap onto a new row after this many
+CHOICE_BUTTONS_PER_ROW = 5
+
+# How often the window checks for messages from the match server
+MATCH_POLL_MS = 20
+
+# Refresh interval of the metrics overlay
+METRICS_OVERLAY_MS = 500
+
+# At most one round is played per frame, however fast keys arrive
+FRAME_SECONDS = 1 / 60
+
 
 class ModernRPSGame:
-    def __init__(self, round_num=1):
-        # Initialize pygame mixer for sounds
-        pygame.mixer.init()
+    TARGET_SCORE = _engine_attr('TARGET_SCORE')
+    ROUND_TIMES = _engine_attr('ROUND_TIMES')
+    choices = _engine_attr('choices')
+    round_num = _engine_attr('round_num')
+    user_score = _engine_attr('user_score')
+    computer_score = _engine_attr('computer_score')
+    current_streak = _engine_attr('current_streak')
+    best_streak = _engine_attr('best_streak')
+    round_history = _engine_attr('round_history')
+    time_left = _engine_attr('time_left')
+
+    def __init__(self, round_num=1, score_store=None, sound=True, strategy="random", rules="classic",
+                 server=None, match_log='matches.rpslog', metrics=None, seed=None, session=None,
+                 assets=BUNDLE_FILE, kiosk=None):
+        self.profile = StartupProfile(STARTED)
+        self.profile.record("imports", STARTED, IMPORTED)
+        
+        # A kiosk station shares the mixer, sprites, score store and match
+        # log with the other stations; see kiosk.py
+        self.kiosk = kiosk
+        
+        # Audio is set up in the background, or not at all with sound=False
+        self.audio = kiosk.audio if kiosk is not None else AudioManager(enabled=sound, profile=self.profile)
+        
+        # Rules, scores and history
+        # Choices, keys, sprites and the rules text all come from one rule set
+        self.rules = RULESETS[rules]
+        self.match_log = kiosk.match_log if kiosk is not None else open_match_log(match_log, rules)
+        
+        # One seeded RNG drives the computer's moves. A recorded or replayed
+        # session also supplies the clocks, so a replay repeats it exactly.
+        self.seed = seed if seed is not None else new_seed()
+        self.session = session
+        rng = random.Random(self.seed)
+        self.engine = GameEngine(
+            round_num,
+            rng=rng,
+            strategy=make_strategy(strategy, rng, self.rules),
+            rules=self.rules,
+            match_log=self.match_log
+        )
+        if session is not None:
+            self.engine.clock = session.clock
+            self.engine.wallclock = session.wallclock
         
-        # Game constants
-        self.TARGET_SCORE = 5
-        self.ROUND_TIMES = [60, 45, 30, 20,10]
         self.COLORS = {
             'bg': '#1B1E3D',  # Dark navy background
             'player': '#FFA500',  # Orange for player
@@ -23,43 +107,89 @@ class ModernRPSGame:
             'header': '#E74C3C'  # Red header
         }
         
-        # Game state
-        self.round_num = round_num
-        self.user_score = 0
-        self.computer_score = 0
-        self.time_left = self.ROUND_TIMES[self.round_num - 1]
+        # Round timings; a disabled Metrics costs next to nothing
+        self.metrics = metrics or Metrics(enabled=False)
+        self.metrics_overlay = None
+        self.metrics_job = None
+        
+        # Window state
         self.game_paused = False
-        self.high_scores = self.load_high_scores()
-        self.current_streak = 0
-        self.best_streak = 0
-        self.round_history = []
-        self.choices = ["rock", "paper", "scissors"]
+        self.timer_job = None
+        self.panels = []
+        # A kiosk station's unanswered end-of-round panel
+        self.question = None
+        
+        # Key and button presses wait here for the next frame
+        self.pending_move = None
+        self.input_job = None
+        self.last_round_at = 0.0
+        self.ending_round = False
+        self.held_keys = set()
+        self.key_released = {}
+        self.transition_ms = None
+        self.first_frame_ms = None
+        self.player_name = default_player_name()
+        self.score_store = score_store or self.load_high_scores()
+        
+        # Online play: moves go to match_server.py instead of the computer
+        self.match = None
+        self.move_sent = False
+        if server is not None:
+            self.connect_match(server, rules)
         
         # Setup main window
-        self.root = tk.Tk()
-        self.root.title(f"Rock Paper Scissors - Round {self.round_num}")
-        self.root.geometry("800x800")
-        self.root.configure(bg=self.COLORS['bg'])
+        with self.profile.phase("create window"):
+            if kiosk is not None:
+                self.root = tk.Toplevel(kiosk.root)
+                self.root.protocol("WM_DELETE_WINDOW", self.on_quit)
+            else:
+                self.root = tk.Tk()
+            self.root.title(f"Rock Paper Scissors - Round {self.round_num}")
+            # HiDPI screens get a window, canvases and sprites twice the size
+            self.ui_scale = pick_scale(self.root)
+            self.root.geometry(f"{WINDOW_SIZE[0] * self.ui_scale}x{WINDOW_SIZE[1] * self.ui_scale}")
+            self.root.configure(bg=self.COLORS['bg'])
         
         # Load sounds
         self.load_sounds()
         
+        # Choice sprites are loaded once, after the first frame is drawn: from
+        # the pre-scaled asset bundle if there is one, else decoded from the PNGs
+        if kiosk is not None:
+            self.sprites = kiosk.sprites
+        else:
+            self.sprites = SpriteCache(self.rules.choices, profile=self.profile, bundle_path=assets, scale=self.ui_scale)
+        
         # Setup UI
-        self.setup_ui()
+        with self.profile.phase("setup_ui"):
+            self.setup_ui()
         self.update_timer()
         
         # Bind keyboard shortcuts
         self.setup_keyboard_shortcuts()
         
+        self.root.after_idle(self.on_first_frame)
+        
+        if self.match is not None:
+            self.wait_for_opponent()
+            self.root.after(MATCH_POLL_MS, self.poll_match)
+        
     def load_sounds(self):
-        try:
-            pygame.mixer.music.load("music.mp3")
-            self.click_sound = pygame.mixer.Sound("click.mp3")
-            self.win_sound = pygame.mixer.Sound("win.mp3")
-            self.lose_sound = pygame.mixer.Sound("lose.mp3")
-            pygame.mixer.music.play(-1)
-        except:
-            print("Sound files not found. Continuing without sound.")
+        # Returns straight away; music starts once the files are decoded
+        self.audio.start()
+
+    def on_first_frame(self):
+        with self.profile.phase("first frame"):
+            self.root.update_idletasks()
+        self.first_frame_ms = (time.perf_counter() - STARTED) * 1000
+        self.root.after_idle(self.sprites.preload)
+
+    def startup_finished(self):
+        return (
+            bool(self.sprites.photos or self.sprites.missing)
+            and self.audio.ready.is_set()
+            and self.score_store.loaded.is_set()
+        )
 
     def setup_ui(self):
         # Main container
@@ -75,6 +205,9 @@ class ModernRPSGame:
         # Game area
         self.setup_game_area()
         
+        # One button per choice
+        self.setup_choice_buttons()
+        
         # Bottom controls
         self.setup_bottom_controls()
         
@@ -86,18 +219,19 @@ class ModernRPSGame:
         header_frame.pack(fill='x', pady=(0, 20))
         
         # Round number
-        tk.Label(
+        self.round_label = tk.Label(
             header_frame,
             text=f"ROUND {self.round_num}",
             font=("Arial", 24, "bold"),
             bg=self.COLORS['bg'],
             fg=self.COLORS['text']
-        ).pack(side=tk.LEFT, padx=10)
+        )
+        self.round_label.pack(side=tk.LEFT, padx=10)
         
         # Timer
         self.timer_label = tk.Label(
             header_frame,
-            text=f"Time: {self.time_left}s",
+            text=f"Time: {self.time_left:.1f}s",
             font=("Arial", 20),
             bg=self.COLORS['bg'],
             fg=self.COLORS['text']
@@ -133,13 +267,14 @@ class ModernRPSGame:
         computer_box = tk.Frame(score_frame, bg='white', padx=30, pady=15)
         computer_box.pack(side=tk.RIGHT, padx=10)
         
-        tk.Label(
+        self.opponent_label = tk.Label(
             computer_box,
             text="COMPUTER",
             font=("Arial", 14),
             bg='white',
             fg=self.COLORS['bg']
-        ).pack()
+        )
+        self.opponent_label.pack()
         
         self.computer_score_label = tk.Label(
             computer_box,
@@ -196,7 +331,7 @@ class ModernRPSGame:
             result_frame,
             text="PLAY AGAIN",
             font=("Arial", 14),
-            command=self.reset_round,
+            command=lambda: self.on_reset(False),
             bg='white',
             fg=self.COLORS['bg'],
             relief=tk.FLAT,
@@ -220,11 +355,33 @@ class ModernRPSGame:
         self.computer_choice_display.pack()
 
     def create_choice_display(self, parent, color):
-        size = 160
+        size = 160 * self.ui_scale
         canvas = tk.Canvas(parent, width=size, height=size, bg=self.COLORS['bg'], highlightthickness=0)
         canvas.create_oval(5, 5, size-5, size-5, fill=color, outline='white', width=3)
+        
+        # Items are created once; update_choice_display only reconfigures them
+        canvas.image_item = canvas.create_image(size//2, size//2, state='hidden')
+        canvas.text_item = canvas.create_text(size//2, size//2, text="", font=("Arial", 20), fill='white')
+        canvas.choice = ""
         return canvas
 
+    def setup_choice_buttons(self):
+        button_frame = tk.Frame(self.main_container, bg=self.COLORS['bg'])
+        button_frame.pack(pady=(0, 10))
+        
+        for i, choice in enumerate(self.rules.choices):
+            tk.Button(
+                button_frame,
+                text=f"{choice.upper()} ({self.rules.keys[choice].upper()})",
+                command=lambda choice=choice: self.queue_move(choice),
+                font=("Arial", 12),
+                bg='white',
+                fg=self.COLORS['bg'],
+                relief=tk.FLAT,
+                padx=10,
+                pady=5
+            ).grid(row=i // CHOICE_BUTTONS_PER_ROW, column=i % CHOICE_BUTTONS_PER_ROW, padx=5, pady=5)
+
     def setup_bottom_controls(self):
         control_frame = tk.Frame(self.main_container, bg=self.COLORS['bg'])
         control_frame.pack(side=tk.BOTTOM, pady=20)
@@ -233,8 +390,8 @@ class ModernRPSGame:
             ("RULES", self.show_rules),
             ("HIGH SCORES", self.show_high_scores),
             ("STATISTICS", self.show_statistics),
-            ("RESET SCORE", lambda: self.reset_round(True)),
-            ("QUIT", self.quit_game)
+            ("RESET SCORE", lambda: self.on_reset(True)),
+            ("QUIT", self.on_quit)
         ]
     
         for text, command in buttons:
@@ -264,161 +421,335 @@ class ModernRPSGame:
         self.history_text.config(state='disabled')
 
     def setup_keyboard_shortcuts(self):
-        self.root.bind('r', lambda e: self.play_round("rock"))
-        self.root.bind('p', lambda e: self.play_round("paper"))
-        self.root.bind('s', lambda e: self.play_round("scissors"))
+        for choice, key in self.rules.keys.items():
+            self.root.bind(key, lambda e, choice=choice: self.on_choice_key(e, choice))
+        self.root.bind('<KeyRelease>', self.on_key_release)
+        # Releases that happen elsewhere, e.g. under a dialog, never arrive
+        self.root.bind('<FocusOut>', lambda e: self.release_keys())
         self.root.bind('h', lambda e: self.show_high_scores())
-        self.root.bind('q', lambda e: self.quit_game())
+        self.root.bind('q', lambda e: self.on_quit())
+        self.root.bind('<F3>', lambda e: self.toggle_metrics_overlay())
+
+    def on_choice_key(self, event, choice):
+        # Holding a key auto-repeats it. Windows repeats the press alone, X11
+        # sends a release and a press with the same timestamp; neither plays.
+        key = event.keysym
+        if key in self.held_keys or self.key_released.get(key) == event.time:
+            return
+        self.held_keys.add(key)
+        self.queue_move(choice)
+
+    def on_key_release(self, event):
+        self.held_keys.discard(event.keysym)
+        self.key_released[event.keysym] = event.time
+
+    def release_keys(self):
+        self.held_keys.clear()
+        self.key_released.clear()
+
+    def queue_move(self, choice):
+        # The first press waits for the next frame; presses until then, and
+        # any during the end of a round, are dropped
+        if self.game_paused or self.ending_round or self.pending_move is not None:
+            return
+        self.pending_move = choice
+        wait = self.last_round_at + FRAME_SECONDS - time.perf_counter()
+        self.input_job = self.root.after(max(round(wait * 1000), 0), self.process_input)
+
+    def process_input(self):
+        self.input_job = None
+        choice, self.pending_move = self.pending_move, None
+        if choice is None or self.ending_round:
+            return
+        self.last_round_at = time.perf_counter()
+        self.play_round(choice)
+
+    def clear_input(self):
+        if self.input_job is not None:
+            self.root.after_cancel(self.input_job)
+            self.input_job = None
+        self.pending_move = None
+        # The end-of-round dialog takes the release of the winning key
+        self.release_keys()
 
     def play_round(self, player_choice):
         if self.game_paused:
             return
-            
-        try:
-            self.click_sound.play()
-        except:
-            pass
-            
-        computer_choice = random.choice(self.choices)
         
-        # Update displays
-        self.update_choice_display(self.player_choice_display, player_choice, self.COLORS['player'])
-        self.update_choice_display(self.computer_choice_display, computer_choice, self.COLORS['computer'])
+        if self.match is not None:
+            self.send_move(player_choice)
+            return
         
-        # Determine winner and update scores
-        result = self.determine_winner(player_choice, computer_choice)
-        self.update_scores(result)
-        self.update_history(player_choice, computer_choice, result)
+        if self.session is not None:
+            self.session.record('move', player_choice)
         
-        # Show result and play again button
-        self.result_label.config(text=f"YOU {result}")
-        self.play_again_btn.pack(pady=10)
+        metrics = self.metrics
+        if metrics.enabled:
+            # Until Tk is idle again, i.e. the result has been drawn
+            started = time.perf_counter()
+            self.root.after_idle(lambda: metrics.record("until drawn", time.perf_counter() - started))
+        
+        with metrics.phase("play_round"):
+            with metrics.phase("sound"):
+                self.audio.play('click')
+            
+            computer_choice = self.engine.computer_choice()
+            
+            # Update displays
+            with metrics.phase("choice render"):
+                self.update_choice_display(self.player_choice_display, player_choice, self.COLORS['player'])
+                self.update_choice_display(self.computer_choice_display, computer_choice, self.COLORS['computer'])
+            
+            # Determine winner and update scores
+            with metrics.phase("winner"):
+                result = self.determine_winner(player_choice, computer_choice)
+            with metrics.phase("score/history"):
+                self.update_scores(result)
+                self.update_history(player_choice, computer_choice, result)
+            
+            # Show result and play again button
+            with metrics.phase("result display"):
+                self.result_label.config(text=f"YOU {result}")
+                self.play_again_btn.pack(pady=10)
+            
+            # Check if round is complete
+            with metrics.phase("end-of-round check"):
+                round_over = self.engine.is_round_over()
         
-        # Check if round is complete
-        if self.user_score == self.TARGET_SCORE or self.computer_score == self.TARGET_SCORE:
+        # Not timed: the end-of-round dialog waits for the player
+        if round_over:
             self.end_round("score_reached")
 
     def update_choice_display(self, canvas, choice, color):
-        canvas.delete("all")
-        size = 160
-        
-        # Draw outer circle
-        canvas.create_oval(5, 5, size-5, size-5, fill=color, outline='white', width=3)
+        # Same choice as last time: nothing to redraw
+        if canvas.choice == choice:
+            return
+        canvas.choice = choice
         
         # Add choice icon
-        try:
-            img = Image.open(f"{choice}.png")
-            img = img.resize((80, 80), Image.LANCZOS)
-            photo = ImageTk.PhotoImage(img)
+        photo = self.sprites.get(choice)
+        if photo is not None:
             canvas.image = photo
-            canvas.create_image(size//2, size//2, image=photo)
-        except:
-            canvas.create_text(size//2, size//2, text=choice.upper(), font=("Arial", 20), fill='white')
+            canvas.itemconfig(canvas.image_item, image=photo, state='normal')
+            canvas.itemconfig(canvas.text_item, state='hidden')
+        else:
+            canvas.itemconfig(canvas.image_item, state='hidden')
+            canvas.itemconfig(canvas.text_item, text=choice.upper(), state='normal')
 
     def determine_winner(self, player, computer):
-        if player == computer:
-            return "DRAW"
-        elif (
-            (player == "rock" and computer == "scissors") or
-            (player == "paper" and computer == "rock") or
-            (player == "scissors" and computer == "paper")
-        ):
-            return "WIN"
-        else:
-            return "LOSE"
+        return self.engine.determine_winner(player, computer)
 
     def update_scores(self, result):
-        if result == "WIN":
-            self.user_score += 1
-            self.current_streak += 1
-            self.best_streak = max(self.current_streak, self.best_streak)
-        elif result == "LOSE":
-            self.computer_score += 1
-            self.current_streak = 0
-            
+        self.engine.update_scores(result)
+        
         self.player_score_label.config(text=str(self.user_score))
         self.computer_score_label.config(text=str(self.computer_score))
         self.streak_label.config(text=f"Streak: {self.current_streak} | Best: {self.best_streak}")
 
     def update_history(self, player_choice, computer_choice, result):
-        self.round_history.append({
-            'user_choice': player_choice,
-            'computer_choice': computer_choice,
-            'result': result,
-            'timestamp': datetime.now().strftime("%H:%M:%S")
-        })
+        entry = self.engine.update_history(player_choice, computer_choice, result)
         
+        # Newest round goes right under the header; lines past the cap are dropped
         self.history_text.config(state='normal')
         self.history_text.insert(
-            '1.0',
-            f"[{self.round_history[-1]['timestamp']}] You: {player_choice} vs Computer: {computer_choice} - {result}\n"
+            '2.0',
+            f"[{entry.time_text()}] You: {player_choice} vs Computer: {computer_choice} - {result}\n"
         )
+        self.history_text.delete(f"{HISTORY_LINES + 2}.0", tk.END)
         self.history_text.config(state='disabled')
 
     def update_timer(self):
-        if not self.game_paused and self.time_left > 0:
-            self.time_left -= 1
-            self.timer_label.config(text=f"Time: {self.time_left}s")
-            
-            if self.time_left <= 10:
-                self.timer_label.config(fg='red')
-            
-            self.root.after(1000, self.update_timer)
-        elif self.time_left <= 0:
-            self.end_round("time_up")
+        self.timer_job = None
+        if self.game_paused:
+            # Remaining time is frozen until the timer is started again
+            self.engine.stop_timer()
+            return
+        
+        if self.engine.deadline is None:
+            self.engine.start_timer()
+        time_up = self.engine.update_time()
+        
+        self.timer_label.config(text=f"Time: {self.time_left:.1f}s")
+        if self.time_left <= 10:
+            self.timer_label.config(fg='red')
+        
+        if time_up:
+            # Online, the server decides when time is up
+            if self.match is None:
+                if self.session is not None:
+                    self.session.record('time_up')
+                self.end_round("time_up")
+            return
+        
+        # Wake up on the next display step rather than a fixed delay,
+        # so a stalled callback doesn't push the rest of the countdown back
+        delay = round((self.time_left % TIMER_STEP) * 1000) or round(TIMER_STEP * 1000)
+        self.timer_job = self.root.after(delay, self.update_timer)
+
+    def stop_timer(self):
+        if self.timer_job is not None:
+            self.root.after_cancel(self.timer_job)
+            self.timer_job = None
+        self.engine.stop_timer()
 
     def end_round(self, end_type):
-        winner = "User" if self.user_score > self.computer_score else "Computer"
-        
+        # Input is ignored until the round is over, dialog included
+        self.ending_round = True
+        self.clear_input()
         try:
-            if winner == "User":
-                self.win_sound.play()
-            else:
-                self.lose_sound.play()
-        except:
-            pass
+            self.finish_round(end_type)
+        finally:
+            self.ending_round = False
+
+    def finish_round(self, end_type):
+        self.stop_timer()
+        winner = self.engine.round_winner()
+        
+        self.audio.play('win' if winner == "User" else 'lose')
             
         self.save_high_score()
         
         if end_type == "score_reached":
             if self.round_num < 6:
-                if messagebox.askyesno(
+                self.dialog(
+                    messagebox.askyesno,
                     "Round Complete",
                     f"Round {self.round_num} complete!\n"
                     f"{winner} won!\n"
                     f"Score: You {self.user_score} - Computer {self.computer_score}\n"
                     f"Best Streak: {self.best_streak}\n\n"
-                    f"Would you like to proceed to round {self.round_num + 1}?"
-                ):
-                    self.root.destroy()
-                    self.start_new_round(self.round_num + 1)
-                else:
-                    self.quit_game()
+                    f"Would you like to proceed to round {self.round_num + 1}?",
+                    self.after_round_complete
+                )
             else:
                 self.quit_game()
         elif end_type == "time_up":
-            if messagebox.showinfo(
+            self.dialog(
+                messagebox.showinfo,
                 "Time's Up!",
                 f"Time's up!\n"
                 f"Final Score: You {self.user_score} - Computer {self.computer_score}\n"
-                f"Best Streak: {self.best_streak}"
-            ):
-                self.quit_game()
+                f"Best Streak: {self.best_streak}",
+                self.after_time_up
+            )
+
+    def after_round_complete(self, proceed):
+        if proceed:
+            self.start_new_round(self.round_num + 1)
+        else:
+            self.quit_game()
+
+    def after_time_up(self, answer):
+        if answer:
+            self.quit_game()
+
+    def dialog(self, show, title, text, then):
+        # End-of-round dialogs decide what happens next, so a recorded
+        # session keeps the answers and a replay answers them itself.
+        # A kiosk station asks in its own window and carries on when answered.
+        if self.kiosk is not None:
+            self.game_paused = True
+            buttons = [("YES", True), ("NO", False)] if show is messagebox.askyesno else [("OK", True)]
+            self.question = self.show_panel(title, text, buttons, then)
+        elif self.session is None:
+            then(show(title, text))
+        else:
+            then(self.session.answer(lambda: show(title, text)))
+
+    def show_info(self, title, text):
+        if self.kiosk is not None:
+            self.show_panel(title, text, [("OK", True)])
+        else:
+            messagebox.showinfo(title, text)
+
+    def show_panel(self, title, text, buttons, then=None):
+        # Message boxes grab the whole Tk interpreter, which on a kiosk would
+        # stop every other station; this one only covers its own window
+        panel = tk.Frame(
+            self.root,
+            bg=self.COLORS['bg'],
+            highlightthickness=2,
+            highlightbackground=self.COLORS['text']
+        )
+        tk.Label(
+            panel,
+            text=title,
+            font=("Arial", 18, "bold"),
+            bg=self.COLORS['bg'],
+            fg=self.COLORS['header']
+        ).pack(padx=20, pady=(15, 5))
+        tk.Label(
+            panel,
+            text=text.strip("\n"),
+            font=("Arial", 12),
+            justify=tk.LEFT,
+            bg=self.COLORS['bg'],
+            fg=self.COLORS['text']
+        ).pack(padx=20, pady=5)
+        
+        button_frame = tk.Frame(panel, bg=self.COLORS['bg'])
+        button_frame.pack(pady=(5, 15))
+        for label, value in buttons:
+            tk.Button(
+                button_frame,
+                text=label,
+                command=lambda value=value: self.close_panel(panel, then, value),
+                font=("Arial", 12),
+                bg='white',
+                fg=self.COLORS['bg'],
+                relief=tk.FLAT,
+                padx=15,
+                pady=5
+            ).pack(side=tk.LEFT, padx=10)
+        panel.place(relx=0.5, rely=0.5, anchor='center')
+        self.panels.append(panel)
+        return panel
+
+    def close_panel(self, panel, then, value):
+        panel.destroy()
+        self.panels.remove(panel)
+        if panel is self.question:
+            self.question = None
+        if then is not None:
+            then(value)
+
+    def on_reset(self, reset_all):
+        # PLAY AGAIN and RESET SCORE stay clickable next to an in-window
+        # question; it has to be answered first, as a message box would be
+        if self.question is not None:
+            return
+        if self.session is not None:
+            self.session.record('reset', reset_all)
+        self.reset_round(reset_all)
+
+    def on_quit(self):
+        if self.session is not None:
+            self.session.record('quit')
+        self.quit_game()
 
     def start_new_round(self, round_num):
-        new_game = ModernRPSGame(round_num)
-        new_game.root.mainloop()
+        # Same window, mixer, sprites and score store; only the game state starts over
+        start = time.perf_counter()
+        
+        self.engine.round_num = round_num
+        self.root.title(f"Rock Paper Scissors - Round {round_num}")
+        self.round_label.config(text=f"ROUND {round_num}")
+        self.reset_round(True)
+        
+        elapsed = time.perf_counter() - start
+        self.transition_ms = elapsed * 1000
+        # Shown with the other round timings under --metrics
+        self.metrics.record("round transition", elapsed)
 
     def reset_round(self, reset_all=False):
-        if reset_all:
-            self.user_score = 0
-            self.computer_score = 0
-            self.current_streak = 0
-            self.best_streak = 0
-            self.round_history = []
-            
+        self.clear_input()
+        # A new round answers whatever was still being asked
+        for panel in self.panels:
+            panel.destroy()
+        self.panels.clear()
+        self.question = None
+        self.engine.reset(reset_all)
         self.game_paused = False
-        self.time_left = self.ROUND_TIMES[self.round_num - 1]
         self.timer_label.config(fg=self.COLORS['text'])
         
         # Clear displays
@@ -438,30 +769,33 @@ class ModernRPSGame:
         self.history_text.insert('1.0', "Game History:\n")
         self.history_text.config(state='disabled')
         
-        # Restart timer
+        # Restart timer, dropping the tick that is already scheduled
+        self.stop_timer()
         self.update_timer()
 
     def show_rules(self):
-        rules_text = """
-        Game Rules:
+        choices = self.rules.choices
+        shortcuts = "\n".join(
+            f"           - '{self.rules.keys[choice].upper()}' for {choice.capitalize()}" for choice in choices
+        )
+        win_conditions = "\n".join(f"           - {line}" for line in self.rules.winner_lines())
+        round_times = "\n".join(
+            f"           - Round {i}: {seconds} seconds" for i, seconds in enumerate(self.ROUND_TIMES, 1)
+        )
         
-        1. Choose rock, paper, or scissors using keyboard shortcuts:
-           - 'R' for Rock
-           - 'P' for Paper
-           - 'S' for Scissors
+        rules_text = f"""
+        Game Rules ({self.rules.name}):
+        
+        1. Choose {', '.join(choices[:-1])}, or {choices[-1]} using keyboard shortcuts:
+{shortcuts}
         
         2. Win conditions:
-           - Rock crushes Scissors
-           - Paper covers Rock
-           - Scissors cuts Paper
+{win_conditions}
         
         3. Scoring:
-           - First to 5 points wins the round
+           - First to {self.TARGET_SCORE} points wins the round
            - Each round has a time limit
-           - Round 1: 60 seconds
-           - Round 2: 45 seconds
-           - Round 3: 30 seconds
-           - Round 4: 20 seconds
+{round_times}
         
         4. Features:
            - Track your winning streak
@@ -470,117 +804,405 @@ class ModernRPSGame:
            - Reset scores at any time
         """
         
-        messagebox.showinfo("Game Rules", rules_text)
+        self.show_info("Game Rules", rules_text)
 
     def show_statistics(self):
-        if not self.round_history:
-            messagebox.showinfo("Statistics", "No games played yet!")
+        stats = self.engine.statistics()
+        if not stats['total_rounds']:
+            self.show_info("Statistics", "No games played yet!")
             return
-            
-        total_games = len(self.round_history)
-        wins = sum(1 for game in self.round_history if game['result'] == 'WIN')
-        losses = sum(1 for game in self.round_history if game['result'] == 'LOSE')
-        draws = sum(1 for game in self.round_history if game['result'] == 'DRAW')
-        
-        win_rate = (wins / total_games) * 100
         
         stats_text = f"""
         Game Statistics:
         
-        Total Games: {total_games}
-        Wins: {wins}
-        Losses: {losses}
-        Draws: {draws}
-        Win Rate: {win_rate:.1f}%
-        Best Streak: {self.best_streak}
-        Current Streak: {self.current_streak}
+        Total Games: {stats['total_rounds']}
+        Wins: {stats['wins']}
+        Losses: {stats['losses']}
+        Draws: {stats['draws']}
+        Win Rate: {stats['win_rate']:.1f}%
+        Best Streak: {stats['best_streak']}
+        Current Streak: {stats['current_streak']}
         
-        Most Used Choice: {self.get_most_used_choice()}
-        Best Performing Choice: {self.get_best_choice()}
+        Most Used Choice: {self.format_choice(stats['most_used_choice'])}
+        Best Performing Choice: {self.format_choice(stats['best_choice'])}
         """
         
-        messagebox.showinfo("Statistics", stats_text)
+        self.show_info("Statistics", stats_text)
+
+    def format_choice(self, choice):
+        return choice.capitalize() if choice else "N/A"
 
     def get_most_used_choice(self):
-        if not self.round_history:
-            return "N/A"
-            
-        choice_counts = {}
-        for game in self.round_history:
-            choice = game['user_choice']
-            choice_counts[choice] = choice_counts.get(choice, 0) + 1
-            
-        return max(choice_counts.items(), key=lambda x: x[1])[0].capitalize()
+        return self.format_choice(self.engine.get_most_used_choice())
 
     def get_best_choice(self):
-        if not self.round_history:
-            return "N/A"
-            
-        choice_stats = {}
-        for game in self.round_history:
-            choice = game['user_choice']
-            if choice not in choice_stats:
-                choice_stats[choice] = {'wins': 0, 'total': 0}
-            
-            choice_stats[choice]['total'] += 1
-            if game['result'] == 'WIN':
-                choice_stats[choice]['wins'] += 1
-        
-        best_choice = max(
-            choice_stats.items(),
-            key=lambda x: (x[1]['wins'] / x[1]['total'] if x[1]['total'] > 0 else 0)
-        )
-        
-        return best_choice[0].capitalize()
+        return self.format_choice(self.engine.get_best_choice())
+
+    @property
+    def high_scores(self):
+        return self.score_store.top()
 
     def load_high_scores(self):
-        try:
-            with open('high_scores.json', 'r') as f:
-                return json.load(f)
-        except:
-            return []
+        # The database is opened on a background thread; the window doesn't wait for it.
+        # Scores from the old high_scores.json are imported the first time.
+        return HighScoreStore('high_scores.db', 'high_scores.json', profile=self.profile)
 
     def save_high_score(self):
         score_entry = {
+            'player': self.player_name,
             'player_score': self.user_score,
             'computer_score': self.computer_score,
             'round': self.round_num,
             'streak': self.best_streak,
-            'timestamp': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            'timestamp': datetime.fromtimestamp(self.engine.wallclock()).strftime("%Y-%m-%d %H:%M:%S")
         }
+        if self.session is not None:
+            self.session.scores.append(score_entry)
         
-        self.high_scores.append(score_entry)
-        self.high_scores.sort(key=lambda x: (-x['player_score'], x['computer_score']))
-        self.high_scores = self.high_scores[:10]  # Keep only top 10
-        
-        try:
-            with open('high_scores.json', 'w') as f:
-                json.dump(self.high_scores, f)
-        except:
-            print("Could not save high scores")
+        # Sorting and the file write happen off the Tk thread
+        self.score_store.add(score_entry)
 
     def show_high_scores(self):
+        self.score_store.wait_loaded(timeout=1)
         if not self.high_scores:
-            messagebox.showinfo("High Scores", "No high scores yet!")
+            self.show_info("High Scores", "No high scores yet!")
             return
             
         scores_text = "TOP 10 HIGH SCORES:\n\n"
         for i, score in enumerate(self.high_scores, 1):
-            scores_text += f"{i}. Player {score['player_score']} - {score['computer_score']} Computer\n"
+            scores_text += f"{i}. {score['player']} {score['player_score']} - {score['computer_score']} Computer\n"
             scores_text += f"   Round: {score['round']} | Best Streak: {score['streak']}\n"
             scores_text += f"   Date: {score['timestamp']}\n\n"
             
-        messagebox.showinfo("High Scores", scores_text)
+        self.show_info("High Scores", scores_text)
 
-    def quit_game(self):
+    def connect_match(self, server, rules):
+        # Only online games load the client (and its asyncio bot code)
+        from match_client import MatchClient, parse_address
+
+        host, port = parse_address(server)
+        match = MatchClient(host, port, self.player_name, rules)
         try:
-            pygame.mixer.music.stop()
-            pygame.mixer.quit()
-        except:
-            pass
+            match.connect()
+        except OSError:
+            print(f"Could not reach the match server at {host}:{port}. Playing against the computer.")
+            return
+        self.match = match
+
+    def wait_for_opponent(self):
+        self.game_paused = True
+        self.stop_timer()
+        self.result_label.config(text="WAITING...")
+
+    def send_move(self, player_choice):
+        # One move per throw; the result comes back from the server
+        if self.move_sent:
+            return
+        self.move_sent = True
+        self.audio.play('click')
+        self.match.move(player_choice)
+        self.update_choice_display(self.player_choice_display, player_choice, self.COLORS['player'])
+        self.update_choice_display(self.computer_choice_display, "", self.COLORS['computer'])
+        self.result_label.config(text="WAITING...")
+
+    def poll_match(self):
+        for message in self.match.poll():
+            if message is None:
+                self.leave_match("Lost the connection to the match server.")
+                return
+            
+            kind = message['type']
+            if kind == 'waiting':
+                self.result_label.config(text="WAITING FOR\nOPPONENT")
+            elif kind == 'start':
+                self.start_match_round(message)
+            elif kind == 'result':
+                self.show_match_result(message)
+            elif kind == 'round_over':
+                if not self.end_match_round(message):
+                    return
+            elif kind == 'opponent_left':
+                self.leave_match("Your opponent left the match.")
+                return
+            elif kind == 'error':
+                print(f"Match server: {message['message']}")
+        
+        self.root.after(MATCH_POLL_MS, self.poll_match)
+
+    def start_match_round(self, message):
+        self.opponent_label.config(text=message['opponent'].upper()[:12])
+        self.engine.round_num = message['round']
+        self.root.title(f"Rock Paper Scissors - Round {message['round']} vs {message['opponent']}")
+        self.round_label.config(text=f"ROUND {message['round']}")
+        self.move_sent = False
+        self.reset_round(True)
+        
+        # The server's clock is the one that counts
+        self.engine.stop_timer()
+        self.engine.time_left = message['time_left']
+        self.engine.start_timer()
+
+    def show_match_result(self, message):
+        self.move_sent = False
+        player_choice, opponent_choice, result = message['you'], message['opponent'], message['result']
+        self.update_choice_display(self.computer_choice_display, opponent_choice, self.COLORS['computer'])
+        self.update_scores(result)
+        self.update_history(player_choice, opponent_choice, result)
+        self.result_label.config(text=f"YOU {result}")
+        
+        self.engine.time_left = message['time_left']
+        self.engine.start_timer()
+
+    def end_match_round(self, message):
+        # Returns False once the window has closed
+        self.stop_timer()
+        self.game_paused = True
+        self.audio.play('win' if message['result'] == "WIN" else 'lose')
+        
+        you, opponent = message['score']
+        if message['reason'] == "time_up":
+            heading = "Time's up!"
+        else:
+            heading = f"Round {message['round']} complete!"
+        summary = f"{heading}\nScore: You {you} - Opponent {opponent}\nBest Streak: {self.best_streak}"
+        if message['next_round'] is None:
+            messagebox.showinfo("Match Over", summary)
+            self.quit_game()
+            return False
+        
+        if messagebox.askyesno("Round Complete", f"{summary}\n\nPlay round {message['next_round']}?"):
+            self.match.ready()
+            self.wait_for_opponent()
+            return True
+        self.quit_game()
+        return False
+
+    def leave_match(self, text):
+        self.stop_timer()
+        messagebox.showinfo("Match Over", text)
+        self.quit_game()
+
+    def toggle_metrics_overlay(self):
+        # F3: live round timings in the corner of the window (needs --metrics)
+        if not self.metrics.enabled:
+            return
+        if self.metrics_overlay is not None:
+            self.root.after_cancel(self.metrics_job)
+            self.metrics_overlay.destroy()
+            self.metrics_overlay = self.metrics_job = None
+            return
+        
+        self.metrics_overlay = tk.Label(
+            self.root,
+            font=("Courier", 9),
+            justify=tk.LEFT,
+            bg='black',
+            fg='#00FF00'
+        )
+        self.metrics_overlay.place(relx=1.0, rely=0.0, anchor='ne')
+        self.refresh_metrics_overlay()
+
+    def refresh_metrics_overlay(self):
+        self.metrics_overlay.config(text="\n".join(self.metrics.summary_lines()))
+        self.metrics_job = self.root.after(METRICS_OVERLAY_MS, self.refresh_metrics_overlay)
+
+    def quit_game(self):
+        if self.session is not None:
+            self.session.finish(self)
+        
+        # Nothing is played after this, even from events already queued
+        self.game_paused = True
+        self.clear_input()
+        if self.metrics_job is not None:
+            self.root.after_cancel(self.metrics_job)
+            self.metrics_job = None
+        if self.match is not None:
+            self.match.close()
+        if self.kiosk is not None:
+            # The mixer, score store and match log stay open for the other stations
+            self.root.destroy()
+            self.kiosk.leave(self)
+            return
+        self.audio.stop()
         self.root.quit()
         self.root.destroy()
+        
+        # Wait for any queued high-score write to reach the disk
+        self.score_store.close()
+        if self.match_log is not None:
+            self.match_log.close()
+
+def open_match_log(path, rules):
+    # Every round is appended to a binary log; see match_log.py
+    if path is None:
+        return None
+    try:
+        return MatchLog(path, rules)
+    except (OSError, ValueError) as error:
+        print(f"Could not open the match log ({error}). Rounds won't be logged.")
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rock Paper Scissors")
+    parser.add_argument(
+        "--no-sound",
+        action="store_true",
+        help="play without music or sound effects (pygame is never imported)"
+    )
+    parser.add_argument(
+        "--benchmark-startup",
+        action="store_true",
+        help="print the time to the first drawn frame and exit"
+    )
+    parser.add_argument(
+        "--ai",
+        choices=list(STRATEGIES),
+        default="random",
+        help="how the computer picks its moves (default: random)"
+    )
+    parser.add_argument(
+        "--rules",
+        choices=list(RULESETS),
+        default="classic",
+        help="game variant: classic, Rock Paper Scissors Lizard Spock, RPS-7 or RPS-15"
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print per-phase startup timings once sounds, sprites and high scores have loaded"
+    )
+    parser.add_argument(
+        "--server",
+        metavar="HOST:PORT",
+        help="play another person through match_server.py instead of the computer"
+    )
+    parser.add_argument(
+        "--match-log",
+        default="matches.rpslog",
+        metavar="PATH",
+        help="binary log every round is appended to (default: matches.rpslog)"
+    )
+    parser.add_argument("--no-match-log", action="store_true", help="don't log rounds")
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="time each phase of a round, show the timings with F3 and write them to PATH on exit"
+    )
+    parser.add_argument(
+        "--metrics-format",
+        choices=["json", "prometheus"],
+        default="json",
+        help="format of the --metrics file (default: json)"
+    )
+    parser.add_argument(
+        "--assets",
+        default=BUNDLE_FILE,
+        metavar="PATH",
+        help=f"pre-scaled sprites built by asset_bundle.py (default: {BUNDLE_FILE}; the PNGs are used without it)"
+    )
+    parser.add_argument("--seed", type=int, help="seed for the computer's moves (default: random)")
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="save the seed, every move, dialog answer and timer event so the session can be replayed"
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="replay a --record file as fast as possible, check it matches and exit"
+    )
+    args = parser.parse_args()
+    if args.server and (args.record or args.replay):
+        parser.error("online games can't be recorded or replayed")
+    
+    metrics = Metrics(enabled=args.metrics is not None)
+    
+    if args.replay:
+        matched = replay(args.replay, metrics)
+        if args.metrics:
+            metrics.dump(args.metrics, args.metrics_format)
+        if not matched:
+            raise SystemExit(1)
+        return
+    
+    seed = args.seed if args.seed is not None else new_seed()
+    session = None
+    if args.record:
+        session = SessionRecorder(args.record, seed, args.rules, args.ai)
+    
+    game = ModernRPSGame(
+        sound=not args.no_sound,
+        strategy=args.ai,
+        rules=args.rules,
+        server=args.server,
+        match_log=None if args.no_match_log else args.match_log,
+        metrics=metrics,
+        seed=seed,
+        session=session,
+        assets=args.assets
+    )
+    
+    if args.benchmark_startup:
+        def report():
+            print(f"Time to first frame: {game.first_frame_ms:.1f} ms")
+            game.quit_game()
+        
+        # Queued behind on_first_frame, so the window is already drawn
+        game.root.after_idle(report)
+    
+    if args.profile_startup:
+        def report_profile():
+            # Background phases finish on their own schedule; keep checking
+            if not game.startup_finished():
+                game.root.after(50, report_profile)
+                return
+            print(game.profile.report())
+        
+        game.root.after_idle(report_profile)
+    
+    game.root.mainloop()
+    
+    if session is not None:
+        # Closing the window ends the session without quit_game
+        session.finish(game)
+        print(f"Session recorded to {args.record} (seed {seed})")
+    
+    if args.metrics:
+        metrics.dump(args.metrics, args.metrics_format)
+
+
+def replay(path, metrics=None):
+    header, events, recorded_digest = load_session(path)
+    session = SessionReplayer(header, events)
+    
+    # No sound, no match log and a throwaway high-score store: a replay
+    # leaves nothing behind
+    game = ModernRPSGame(
+        round_num=header['round_num'],
+        score_store=HighScoreStore(':memory:', None),
+        sound=False,
+        strategy=header['strategy'],
+        rules=header['rules'],
+        match_log=None,
+        metrics=metrics,
+        seed=header['seed'],
+        session=session
+    )
+    game.root.withdraw()
+    
+    start = time.perf_counter()
+    digest = session.run(game)
+    elapsed = time.perf_counter() - start
+    
+    print(f"Replayed {len(events)} events ({game.engine.total_rounds} rounds) in {elapsed * 1000:.1f} ms")
+    if recorded_digest is None:
+        print(f"Final state {digest}; the recording has no digest to compare with")
+    elif digest == recorded_digest:
+        print(f"Final state matches the recording ({digest[:16]})")
+    else:
+        print(f"Final state differs from the recording: {digest[:16]} != {recorded_digest[:16]}")
+    return digest == recorded_digest
 
 if __name__ == "__main__":
-    game = ModernRPSGame()
-    game.root.mainloop()
\ No newline at end of file
+    main()
\ No newline at end of file
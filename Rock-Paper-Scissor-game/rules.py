@@ -0,0 +1,140 @@
+# Result codes shared by the engine, the batch resolver and the strategies
+DRAW, WIN, LOSE = 0, 1, 2
+RESULT_NAMES = ["DRAW", "WIN", "LOSE"]
+
+# Keys the window already uses for other things
+RESERVED_KEYS = {'h', 'q'}
+
+
+def assign_keys(choices, keys, reserved=RESERVED_KEYS):
+    # Explicit keys win; the rest get the first free letter of their name
+    assigned = dict(keys or {})
+    taken = set(assigned.values()) | set(reserved)
+    for choice in choices:
+        if choice in assigned:
+            continue
+        for key in choice.lower() + "abcdefgijklmnoprstuvwxyz0123456789":
+            if key.isalnum() and key not in taken:
+                assigned[choice] = key
+                taken.add(key)
+                break
+        else:
+            raise ValueError(f"No free key left for {choice!r}")
+    return assigned
+
+
+class RuleSet:
+    def __init__(self, name, choices, beats='previous', keys=None, verbs=None):
+        size = len(choices)
+        if size < 3 or size % 2 == 0:
+            raise ValueError(f"{name}: a cyclic game needs an odd number of choices (got {size})")
+        if len(set(choices)) != size:
+            raise ValueError(f"{name}: choices must be unique")
+        if beats not in ('previous', 'next'):
+            raise ValueError(f"{name}: beats must be 'previous' or 'next'")
+
+        self.name = name
+        self.choices = list(choices)
+        self.size = size
+        self.index = {choice: i for i, choice in enumerate(self.choices)}
+
+        # Every choice beats the (N - 1) / 2 choices listed just before it
+        # ('previous') or just after it ('next'), wrapping around the list
+        self.direction = 1 if beats == 'previous' else -1
+        half = (size - 1) // 2
+        self.distance_results = [DRAW] + [WIN] * half + [LOSE] * half
+
+        # Compiled once: matrix[player * N + computer] -> result code
+        self.matrix = [
+            self.distance_results[(self.direction * (player - computer)) % size]
+            for player in range(size)
+            for computer in range(size)
+        ]
+        self.outcomes = {
+            (self.choices[player], self.choices[computer]): RESULT_NAMES[self.matrix[player * size + computer]]
+            for player in range(size)
+            for computer in range(size)
+        }
+
+        # counters[i] is the index of a choice that beats choice i
+        self.counters = [(i + self.direction) % size for i in range(size)]
+
+        self.keys = assign_keys(self.choices, keys)
+        self.verbs = dict(verbs or {})
+
+    def resolve(self, player, computer):
+        return self.matrix[player * self.size + computer]
+
+    def beaten_by(self, winner):
+        return [loser for loser in self.choices if self.outcomes[(winner, loser)] == "WIN"]
+
+    def winner_lines(self):
+        # "Rock crushes Scissors" for every winning pair, in choice order;
+        # pairs without a verb are grouped as "Rock beats Fire, Scissors"
+        lines = []
+        for winner in self.choices:
+            plain = []
+            for loser in self.beaten_by(winner):
+                verb = self.verbs.get((winner, loser))
+                if verb:
+                    lines.append(f"{winner.capitalize()} {verb} {loser.capitalize()}")
+                else:
+                    plain.append(loser.capitalize())
+            if plain:
+                lines.append(f"{winner.capitalize()} beats {', '.join(plain)}")
+        return lines
+
+
+CLASSIC = RuleSet(
+    "Rock Paper Scissors",
+    ["rock", "paper", "scissors"],
+    keys={'rock': 'r', 'paper': 'p', 'scissors': 's'},
+    verbs={
+        ('rock', 'scissors'): "crushes",
+        ('paper', 'rock'): "covers",
+        ('scissors', 'paper'): "cuts"
+    }
+)
+
+RPSLS = RuleSet(
+    "Rock Paper Scissors Lizard Spock",
+    ["rock", "spock", "paper", "lizard", "scissors"],
+    keys={'rock': 'r', 'paper': 'p', 'scissors': 's', 'lizard': 'l', 'spock': 'k'},
+    verbs={
+        ('scissors', 'paper'): "cuts",
+        ('paper', 'rock'): "covers",
+        ('rock', 'lizard'): "crushes",
+        ('lizard', 'spock'): "poisons",
+        ('spock', 'scissors'): "smashes",
+        ('scissors', 'lizard'): "decapitates",
+        ('lizard', 'paper'): "eats",
+        ('paper', 'spock'): "disproves",
+        ('spock', 'rock'): "vaporizes",
+        ('rock', 'scissors'): "crushes"
+    }
+)
+
+# David Lovelace's variants list each object before the ones it beats
+RPS7 = RuleSet(
+    "RPS-7",
+    ["rock", "fire", "scissors", "sponge", "paper", "air", "water"],
+    beats='next',
+    keys={'rock': 'r', 'paper': 'p', 'scissors': 's'}
+)
+
+RPS15 = RuleSet(
+    "RPS-15",
+    [
+        "rock", "fire", "scissors", "snake", "human", "tree", "wolf", "sponge",
+        "paper", "air", "water", "dragon", "devil", "lightning", "gun"
+    ],
+    beats='next',
+    keys={'rock': 'r', 'paper': 'p', 'scissors': 's'}
+)
+
+RULESETS = {
+    'classic': CLASSIC,
+    'rpsls': RPSLS,
+    'rps7': RPS7,
+    'rps15': RPS15
+}
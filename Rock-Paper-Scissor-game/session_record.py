@@ -0,0 +1,177 @@
+import random
+import time
+from collections import deque
+
+# A session file is JSON lines: a header, one line per event, and a last
+# line with the digest of the final game state.
+#   {"version": 1, "seed": ..., "rules": ..., "strategy": ..., "round_num": ..., "wall_start": ...}
+#   [t, "move", "rock"]       a round played (t: seconds since the session started)
+#   [t, "answer", true]       an end-of-round dialog and how it was answered
+#   [t, "time_up", null]      the round timer ran out
+#   [t, "reset", true]        PLAY AGAIN (false) or RESET SCORE (true)
+#   [t, "quit", null]         Q or the QUIT button
+#   {"digest": "..."}
+VERSION = 1
+
+
+def new_seed():
+    return random.SystemRandom().randrange(2 ** 32)
+
+
+def state_digest(game, scores):
+    # Everything a replay has to reproduce exactly: the rounds with their
+    # timestamps, the running totals, the scores and the high scores saved.
+    # hashlib and json load only when a session is recorded or replayed.
+    import hashlib
+    import json
+
+    engine = game.engine
+    state = {
+        'history': [
+            [record.user_choice, record.computer_choice, record.result, record.timestamp]
+            for record in engine.round_history
+        ],
+        'statistics': engine.statistics(),
+        'round_num': engine.round_num,
+        'score': [engine.user_score, engine.computer_score],
+        'saved_scores': scores
+    }
+    return hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()
+
+
+class SessionRecorder:
+    # Writes a session as it is played; the game's clock runs from zero at
+    # the start so the recorded times replay with the same arithmetic
+    def __init__(self, path, seed, rules, strategy, round_num=1):
+        self.path = path
+        self.origin = time.monotonic()
+        self.header = {
+            'version': VERSION,
+            'seed': seed,
+            'rules': rules,
+            'strategy': strategy,
+            'round_num': round_num,
+            'wall_start': time.time()
+        }
+        self.events = []
+        self.scores = []
+        # Time of the event being handled; history timestamps come from it
+        self.event_time = 0.0
+        self.finished = False
+
+    def clock(self):
+        return time.monotonic() - self.origin
+
+    def wallclock(self):
+        return self.header['wall_start'] + self.event_time
+
+    def record(self, kind, value=None):
+        self.event_time = self.clock()
+        self.events.append([self.event_time, kind, value])
+
+    def answer(self, ask):
+        value = ask()
+        self.record('answer', value)
+        return value
+
+    def finish(self, game):
+        if self.finished:
+            return
+        self.finished = True
+        self.digest = state_digest(game, self.scores)
+        import json
+
+        try:
+            with open(self.path, 'w') as f:
+                f.write(json.dumps(self.header) + "\n")
+                for event in self.events:
+                    f.write(json.dumps(event) + "\n")
+                f.write(json.dumps({'digest': self.digest}) + "\n")
+        except OSError:
+            print(f"Could not write the session recording to {self.path}")
+
+
+def load_session(path):
+    import json
+
+    with open(path, 'r') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or not isinstance(lines[0], dict) or lines[0].get('version') != VERSION:
+        raise ValueError(f"{path}: not a version {VERSION} session recording")
+
+    header, events, digest = lines[0], [], None
+    for line in lines[1:]:
+        if isinstance(line, dict):
+            digest = line.get('digest')
+        else:
+            events.append(line)
+    return header, events, digest
+
+
+class ReplayClock:
+    # Stands still until the replay moves it to the next event
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class SessionReplayer:
+    # Plays a recording back through a ModernRPSGame as fast as it can:
+    # the window's after() timer never fires, the recorded events stand in
+    # for the clock ticks, key presses and dialog answers
+    def __init__(self, header, events):
+        self.header = header
+        self.events = [event for event in events if event[1] != 'answer']
+        self.answers = deque(event for event in events if event[1] == 'answer')
+        self.clock = ReplayClock()
+        self.scores = []
+        self.event_time = 0.0
+        self.finished = False
+        self.digest = None
+
+    def wallclock(self):
+        return self.header['wall_start'] + self.event_time
+
+    def move_to(self, t):
+        self.event_time = t
+        self.clock.now = t
+
+    def record(self, kind, value=None):
+        # The events are already recorded
+        pass
+
+    def answer(self, ask):
+        if not self.answers:
+            # The replay has gone its own way; the digest will show it
+            return False
+        t, kind, value = self.answers.popleft()
+        self.move_to(t)
+        return value
+
+    def finish(self, game):
+        if not self.finished:
+            self.finished = True
+            self.digest = state_digest(game, self.scores)
+
+    def run(self, game):
+        for t, kind, value in self.events:
+            if self.finished:
+                break
+            self.move_to(t)
+            if kind == 'move':
+                game.play_round(value)
+            elif kind == 'time_up':
+                # The tick that saw the time run out, run now instead of by Tk
+                if game.timer_job is not None:
+                    game.root.after_cancel(game.timer_job)
+                game.update_timer()
+            elif kind == 'reset':
+                game.reset_round(value)
+            elif kind == 'quit':
+                game.quit_game()
+        if not self.finished:
+            # The recording ended by closing the window
+            game.quit_game()
+        return self.digest
@@ -0,0 +1,120 @@
+import time
+
+from game_engine import CHOICES
+from startup_profile import StartupProfile
+
+SPRITE_SIZE = (80, 80)
+
+
+class SpriteCache:
+    def __init__(self, names=CHOICES, size=SPRITE_SIZE, profile=None, bundle_path=None, scale=1):
+        self.names = list(names)
+        self.size = (size[0] * scale, size[1] * scale)
+        self.profile = profile or StartupProfile()
+        self.images = {}
+        self.photos = {}
+        self.missing = set()
+        # Pre-scaled sprites from asset_bundle.py, read on first use
+        self.bundle_path = bundle_path
+        self.scale = scale
+        self.bundle = None
+
+    def open_bundle(self):
+        if self.bundle is None and self.bundle_path is not None:
+            from asset_bundle import AssetBundle
+
+            try:
+                with self.profile.phase("asset bundle read"):
+                    self.bundle = AssetBundle(self.bundle_path, self.names, self.scale)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as error:
+                print(f"Could not read the asset bundle ({error}). Decoding the sprites instead.")
+            # Tried once either way
+            self.bundle_path = None
+        return self.bundle
+
+    def load_image(self, name):
+        # Decode and scale once; later calls reuse the result
+        if name in self.images:
+            return self.images[name]
+        if not name or name in self.missing:
+            return None
+
+        bundle = self.open_bundle()
+        if bundle is not None:
+            image = bundle.image(name, self.size)
+            if image is not None:
+                self.images[name] = image
+                return image
+
+        # Pillow is only imported once the first sprite is needed
+        from PIL import Image
+
+        try:
+            with Image.open(f"{name}.png") as img:
+                image = img.resize(self.size, Image.LANCZOS)
+        except OSError:
+            self.missing.add(name)
+            return None
+
+        self.images[name] = image
+        return image
+
+    def get(self, name):
+        # Tk PhotoImages need a root window, so they are built on first use
+        photo = self.photos.get(name)
+        if photo is not None:
+            return photo
+
+        image = self.load_image(name)
+        if image is None:
+            return None
+
+        from PIL import ImageTk
+
+        photo = ImageTk.PhotoImage(image)
+        self.photos[name] = photo
+        return photo
+
+    def preload(self):
+        with self.profile.phase("sprite preload"):
+            for name in self.names:
+                self.get(name)
+
+
+def measure_click_latency(clicks=200):
+    import tkinter as tk
+    from PIL import Image, ImageTk
+
+    root = tk.Tk()
+    root.withdraw()
+
+    # Old path: open, resize and wrap a fresh PhotoImage on every click
+    start = time.perf_counter()
+    for i in range(clicks):
+        img = Image.open(f"{CHOICES[i % len(CHOICES)]}.png")
+        img = img.resize(SPRITE_SIZE, Image.LANCZOS)
+        ImageTk.PhotoImage(img)
+    uncached = (time.perf_counter() - start) / clicks
+
+    cache = SpriteCache()
+    start = time.perf_counter()
+    cache.preload()
+    preload_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(clicks):
+        cache.get(CHOICES[i % len(CHOICES)])
+    cached = (time.perf_counter() - start) / clicks
+
+    root.destroy()
+    return uncached, cached, preload_time
+
+
+if __name__ == "__main__":
+    uncached, cached, preload_time = measure_click_latency()
+    # Each round draws two sprites, one per side
+    print(f"Per-sprite decode + resize: {uncached * 1000:.3f} ms ({uncached * 2000:.3f} ms per round)")
+    print(f"Per-sprite cache lookup:    {cached * 1000:.4f} ms ({cached * 2000:.4f} ms per round)")
+    print(f"One-time preload:           {preload_time * 1000:.3f} ms")
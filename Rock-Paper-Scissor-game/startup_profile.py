@@ -0,0 +1,35 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    def __init__(self, started=None):
+        self.started = started if started is not None else time.perf_counter()
+        self.phases = []
+        # Audio and high scores load on their own threads and record here too
+        self.lock = threading.Lock()
+
+    def record(self, name, start, end):
+        with self.lock:
+            self.phases.append((name, start, end, threading.current_thread().name))
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def report(self):
+        with self.lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+
+        lines = [f"{'phase':<22} {'starts at':>10} {'took':>10}  thread"]
+        for name, start, end, thread in phases:
+            lines.append(
+                f"{name:<22} {(start - self.started) * 1000:>8.1f}ms "
+                f"{(end - start) * 1000:>8.1f}ms  {thread}"
+            )
+        return "\n".join(lines)
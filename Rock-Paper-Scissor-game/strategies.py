@@ -0,0 +1,265 @@
+import argparse
+import random
+import time
+
+from game_engine import CHOICES, OUTCOMES
+from rules import CLASSIC
+
+
+class RandomStrategy:
+    name = "random"
+
+    def __init__(self, rng=None, rules=CLASSIC):
+        self.rng = rng if rng is not None else random.Random()
+        self.rules = rules
+        # Choices are handled as indexes internally, per the rule set
+        self.choices = rules.choices
+        self.index = rules.index
+        self.counter = [rules.choices[i] for i in rules.counters]
+
+    def choose(self):
+        return self.rng.choice(self.choices)
+
+    def observe(self, player_choice, computer_choice):
+        pass
+
+
+class FrequencyStrategy(RandomStrategy):
+    name = "frequency"
+
+    def __init__(self, rng=None, rules=CLASSIC, decay=1.0):
+        super().__init__(rng, rules)
+        # decay < 1 lets old moves fade so the counts follow a changing player
+        self.decay = decay
+        self.counts = [0.0] * rules.size
+
+    def predict(self):
+        counts = self.counts
+        best = max(counts)
+        if best == 0:
+            return None
+        return counts.index(best)
+
+    def choose(self):
+        predicted = self.predict()
+        if predicted is None:
+            return self.rng.choice(self.choices)
+        return self.counter[predicted]
+
+    def observe(self, player_choice, computer_choice):
+        counts = self.counts
+        if self.decay != 1.0:
+            decay = self.decay
+            for i in range(len(counts)):
+                counts[i] *= decay
+        counts[self.index[player_choice]] += 1
+
+
+class MarkovStrategy(RandomStrategy):
+    name = "markov"
+
+    def __init__(self, rng=None, rules=CLASSIC, order=2):
+        super().__init__(rng, rules)
+        self.order = order
+        self.size = rules.size
+        # One row of next-move counts per possible context of the last
+        # `order` player moves: N ** order rows, fixed for the whole game
+        self.contexts = self.size ** order
+        self.table = [0] * (self.contexts * self.size)
+        self.context = 0
+        self.seen = 0
+
+    def predict(self):
+        if self.seen < self.order:
+            return None
+        row = self.context * self.size
+        counts = self.table[row:row + self.size]
+        best = max(counts)
+        if best == 0:
+            return None
+        return counts.index(best)
+
+    def choose(self):
+        predicted = self.predict()
+        if predicted is None:
+            return self.rng.choice(self.choices)
+        return self.counter[predicted]
+
+    def observe(self, player_choice, computer_choice):
+        move = self.index[player_choice]
+        if self.seen >= self.order:
+            self.table[self.context * self.size + move] += 1
+        else:
+            self.seen += 1
+        # Slide the context window: drop the oldest move, append this one
+        self.context = (self.context * self.size + move) % self.contexts
+
+
+class MixtureStrategy(RandomStrategy):
+    name = "mixture"
+
+    def __init__(self, rng=None, rules=CLASSIC, experts=None, decay=0.9):
+        super().__init__(rng, rules)
+        if experts is None:
+            experts = [
+                FrequencyStrategy(self.rng, rules),
+                FrequencyStrategy(self.rng, rules, decay=0.8),
+                MarkovStrategy(self.rng, rules, order=1),
+                MarkovStrategy(self.rng, rules, order=2),
+                MarkovStrategy(self.rng, rules, order=3)
+            ]
+        self.experts = experts
+        self.decay = decay
+        self.scores = [0.0] * len(experts)
+        self.last_picks = [None] * len(experts)
+
+    def choose(self):
+        # Every expert makes a pick; the one with the best recent record is played
+        picks = [expert.choose() for expert in self.experts]
+        self.last_picks = picks
+        scores = self.scores
+        best = scores.index(max(scores))
+        return picks[best]
+
+    def observe(self, player_choice, computer_choice):
+        decay = self.decay
+        scores = self.scores
+        outcomes = self.rules.outcomes
+        for i, pick in enumerate(self.last_picks):
+            if pick is not None:
+                result = outcomes[(pick, player_choice)]
+                scores[i] = scores[i] * decay + (1 if result == "WIN" else -1 if result == "LOSE" else 0)
+        for expert in self.experts:
+            expert.observe(player_choice, computer_choice)
+
+
+class BiasedStrategy(RandomStrategy):
+    name = "biased"
+
+    def __init__(self, rng=None, rules=CLASSIC, weights=(0.5, 0.25, 0.25)):
+        super().__init__(rng, rules)
+        # Fixed bot: ignores the opponent and picks with the given weights
+        if len(weights) != rules.size:
+            raise ValueError(f"Expected {rules.size} weights, got {len(weights)}")
+        self.weights = list(weights)
+
+    def choose(self):
+        return self.rng.choices(self.choices, self.weights)[0]
+
+
+class ReplayStrategy(RandomStrategy):
+    name = "replay"
+
+    def __init__(self, rng=None, rules=CLASSIC, moves=("rock",)):
+        super().__init__(rng, rules)
+        # Plays back a recorded move sequence, starting over at the end
+        self.moves = list(moves)
+        self.position = 0
+
+    def choose(self):
+        move = self.moves[self.position]
+        self.position = (self.position + 1) % len(self.moves)
+        return move
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (RandomStrategy, FrequencyStrategy, MarkovStrategy, MixtureStrategy)
+}
+
+
+def make_strategy(name, rng=None, rules=CLASSIC):
+    try:
+        return STRATEGIES[name](rng, rules)
+    except KeyError:
+        raise ValueError(f"Unknown strategy {name!r}; choose from {', '.join(STRATEGIES)}") from None
+
+
+# Scripted players used to check how well each strategy adapts
+def constant_player(choice="rock"):
+    while True:
+        yield choice
+
+
+def cycle_player():
+    while True:
+        yield from CHOICES
+
+
+def biased_player(rng, bias="rock", weight=0.5):
+    others = [choice for choice in CHOICES if choice != bias]
+    while True:
+        yield bias if rng.random() < weight else rng.choice(others)
+
+
+def uniform_player(rng):
+    while True:
+        yield rng.choice(CHOICES)
+
+
+def pattern_player(pattern=("rock", "rock", "paper", "scissors", "paper")):
+    while True:
+        yield from pattern
+
+
+def scripted_players(seed):
+    rng = random.Random(seed)
+    return {
+        "always rock": constant_player(),
+        "cycle r-p-s": cycle_player(),
+        "50% rock": biased_player(rng),
+        "r-r-p-s-p loop": pattern_player(),
+        "uniform random": uniform_player(rng)
+    }
+
+
+def win_rate(strategy, moves, rounds):
+    wins = losses = 0
+    for _ in range(rounds):
+        computer_choice = strategy.choose()
+        player_choice = next(moves)
+        result = OUTCOMES[(computer_choice, player_choice)]
+        if result == "WIN":
+            wins += 1
+        elif result == "LOSE":
+            losses += 1
+        strategy.observe(player_choice, computer_choice)
+    return wins / rounds, losses / rounds
+
+
+def predictions_per_second(name, rounds, seed=0):
+    strategy = make_strategy(name, random.Random(seed))
+    moves = uniform_player(random.Random(seed + 1))
+    player_moves = [next(moves) for _ in range(rounds)]
+    choose = strategy.choose
+    observe = strategy.observe
+
+    start = time.perf_counter()
+    for player_choice in player_moves:
+        observe(player_choice, choose())
+    return rounds / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the computer opponent strategies")
+    parser.add_argument("--rounds", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'strategy':<10} {'moves/s':>12}")
+    for name in STRATEGIES:
+        print(f"{name:<10} {predictions_per_second(name, args.rounds, args.seed):>12,.0f}")
+
+    print()
+    opponents = list(scripted_players(args.seed))
+    print(f"{'computer win / loss rate':<26}" + "".join(f"{opponent:>17}" for opponent in opponents))
+    for name in STRATEGIES:
+        row = f"{name:<26}"
+        for opponent, moves in scripted_players(args.seed).items():
+            wins, losses = win_rate(make_strategy(name, random.Random(args.seed)), moves, args.rounds)
+            row += f"{wins * 100:>10.1f}/{losses * 100:>5.1f}%"
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
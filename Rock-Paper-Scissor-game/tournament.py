@@ -0,0 +1,217 @@
+import argparse
+import itertools
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from game_engine import GameEngine
+from rules import RULESETS
+from strategies import STRATEGIES, BiasedStrategy, ReplayStrategy
+
+# Simulated seconds each move takes against the ROUND_TIMES limits
+MOVE_SECONDS = 1.0
+
+# Games per worker task; small enough to balance, large enough to amortize IPC
+CHUNK_GAMES = 2000
+
+TALLY_KEYS = ("WIN", "LOSE", "DRAW", "rounds_a", "rounds_b", "rounds_drawn")
+
+SHORT_NAMES = {"r": "rock", "p": "paper", "s": "scissors"}
+
+
+def builtin_players(rules):
+    # name -> (kind, argument); plain tuples so they pickle to the workers
+    players = {name: ("strategy", name) for name in STRATEGIES}
+    # Each bias bot plays its favourite 60% of the time
+    other_weight = 0.4 / (rules.size - 1)
+    for choice in rules.choices:
+        weights = tuple(0.6 if other == choice else other_weight for other in rules.choices)
+        players[f"{choice}-bias"] = ("biased", weights)
+    return players
+
+
+def make_player(spec, rng, rules):
+    kind, argument = spec
+    if kind == "strategy":
+        return STRATEGIES[argument](rng, rules)
+    if kind == "biased":
+        return BiasedStrategy(rng, rules, argument)
+    if kind == "replay":
+        return ReplayStrategy(rng, rules, argument)
+    raise ValueError(f"Unknown player kind {kind!r}")
+
+
+def load_moves(path, rules):
+    # Accepts whitespace or comma separated moves, full names or r/p/s
+    with open(path, 'r') as f:
+        words = f.read().replace(",", " ").split()
+
+    moves = []
+    for word in words:
+        move = SHORT_NAMES.get(word.lower(), word.lower())
+        if move not in rules.index:
+            raise ValueError(f"{path}: {word!r} is not a move")
+        moves.append(move)
+    if not moves:
+        raise ValueError(f"{path}: no moves found")
+    return tuple(moves)
+
+
+class SimulatedClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def play_game(engine, clock, player_a, player_b, tally, move_seconds=MOVE_SECONDS):
+    # One game as the window plays it: rounds 1..N with shrinking time
+    # limits, first to TARGET_SCORE takes the round, a time-out ends the game
+    for round_num in range(1, len(engine.ROUND_TIMES) + 1):
+        engine.round_num = round_num
+        engine.reset(True)
+        engine.start_timer()
+
+        time_up = False
+        while not engine.is_round_over():
+            move_a = player_a.choose()
+            move_b = player_b.choose()
+            result = engine.play(move_a, move_b)[1]
+            player_a.observe(move_b, move_a)
+            player_b.observe(move_a, move_b)
+            tally[result] += 1
+
+            clock.now += move_seconds
+            if engine.update_time():
+                time_up = True
+                break
+
+        if engine.user_score > engine.computer_score:
+            tally['rounds_a'] += 1
+        elif engine.computer_score > engine.user_score:
+            tally['rounds_b'] += 1
+        else:
+            tally['rounds_drawn'] += 1
+
+        if time_up:
+            break
+
+
+def run_matchup(spec_a, spec_b, games, seed, rules_name='classic'):
+    # Runs in a worker process. The RNG is seeded from the task itself,
+    # so results don't depend on how tasks land on workers
+    rules = RULESETS[rules_name]
+    rng = random.Random(seed)
+    clock = SimulatedClock()
+    engine = GameEngine(rng=rng, history_size=0, clock=clock, rules=rules)
+    player_a = make_player(spec_a, random.Random(rng.random()), rules)
+    player_b = make_player(spec_b, random.Random(rng.random()), rules)
+
+    tally = dict.fromkeys(TALLY_KEYS, 0)
+    for _ in range(games):
+        play_game(engine, clock, player_a, player_b, tally)
+    return tally
+
+
+def run_tournament(players, games, seed=0, workers=None, chunk=CHUNK_GAMES, rules_name='classic'):
+    # Round robin over every pair; each pairing is split into chunks of games
+    tasks = []
+    for name_a, name_b in itertools.combinations(players, 2):
+        for start in range(0, games, chunk):
+            task_seed = f"{seed}:{name_a}:{name_b}:{start}"
+            tasks.append((name_a, name_b, min(chunk, games - start), task_seed))
+
+    results = {
+        pair: dict.fromkeys(TALLY_KEYS, 0)
+        for pair in itertools.combinations(players, 2)
+    }
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            (name_a, name_b, pool.submit(run_matchup, players[name_a], players[name_b], count, task_seed, rules_name))
+            for name_a, name_b, count, task_seed in tasks
+        ]
+        for name_a, name_b, future in futures:
+            totals = results[(name_a, name_b)]
+            for key, value in future.result().items():
+                totals[key] += value
+
+    return results
+
+
+def format_results(results):
+    lines = [
+        f"{'player A':<16} {'player B':<16} {'rounds A':>9} {'rounds B':>9} {'drawn':>7} "
+        f"{'moves':>11} {'A win%':>7} {'B win%':>7}"
+    ]
+    standings = {}
+    for (name_a, name_b), totals in results.items():
+        moves = totals['WIN'] + totals['LOSE'] + totals['DRAW']
+        lines.append(
+            f"{name_a:<16} {name_b:<16} {totals['rounds_a']:>9,} {totals['rounds_b']:>9,} "
+            f"{totals['rounds_drawn']:>7,} {moves:>11,} "
+            f"{totals['WIN'] / moves * 100:>6.1f}% {totals['LOSE'] / moves * 100:>6.1f}%"
+        )
+        for name, won, lost in (
+            (name_a, totals['rounds_a'], totals['rounds_b']),
+            (name_b, totals['rounds_b'], totals['rounds_a'])
+        ):
+            record = standings.setdefault(name, [0, 0])
+            record[0] += won
+            record[1] += lost
+
+    lines.append("")
+    lines.append(f"{'standings':<16} {'rounds won':>11} {'rounds lost':>12} {'win%':>7}")
+    for name, (won, lost) in sorted(standings.items(), key=lambda item: -item[1][0] / max(sum(item[1]), 1)):
+        lines.append(f"{name:<16} {won:>11,} {lost:>12,} {won / max(won + lost, 1) * 100:>6.1f}%")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Round-robin tournament between computer players")
+    parser.add_argument("--rules", choices=list(RULESETS), default="classic", help="game variant")
+    parser.add_argument("--games", type=int, default=10_000, help="games per pairing")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument(
+        "--players",
+        nargs="+",
+        help="players to enter (default: all strategies plus one bias bot per choice)"
+    )
+    parser.add_argument(
+        "--replay",
+        action="append",
+        default=[],
+        metavar="NAME=FILE",
+        help="add a player that replays the moves in FILE"
+    )
+    args = parser.parse_args()
+
+    rules = RULESETS[args.rules]
+    players = builtin_players(rules)
+    entered = {}
+    for name in args.players or players:
+        if name not in players:
+            parser.error(f"unknown player {name!r}")
+        entered[name] = players[name]
+    for replay in args.replay:
+        name, _, path = replay.partition("=")
+        if not path:
+            parser.error("--replay expects NAME=FILE")
+        entered[name] = ("replay", load_moves(path, rules))
+    if len(entered) < 2:
+        parser.error("a tournament needs at least two players")
+
+    start = time.perf_counter()
+    results = run_tournament(entered, args.games, args.seed, args.workers, rules_name=args.rules)
+    elapsed = time.perf_counter() - start
+
+    print(format_results(results))
+    moves = sum(totals['WIN'] + totals['LOSE'] + totals['DRAW'] for totals in results.values())
+    print(f"\n{moves:,} moves in {elapsed:.2f}s on {args.workers} workers ({moves / elapsed:,.0f} moves/s)")
+
+
+if __name__ == "__main__":
+    main()